@@ -1,32 +1,112 @@
+import functools
 import io
 import logging
+import mmap
 import os
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import NamedTuple, Optional
 
-import librosa
 import numpy as np
+import soundfile as sf
 
 from tarzan.features.tensor import Tensor
 
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=None)
+def _load_librosa():
+    """Import librosa on first use.
+
+    Importing librosa initializes numba and costs about a second, which is wasted
+    when `tarzan.features` is only used for schema handling or non-audio data.
+    """
+    import librosa
+
+    try:
+        import audioread
+    except ImportError:  # pragma: no cover - audioread is a librosa dependency
+        return librosa
+
+    # `librosa.load` falls back to `audioread.audio_open`, which probes the available
+    # backends (GStreamer, FFmpeg, ...) on every call in older audioread releases.
+    # Probe once and serve the cached tuple afterwards.
+    probe_backends = audioread.available_backends
+    backends = tuple(probe_backends())
+
+    def cached_backends(flush_cache=False):
+        nonlocal backends
+        if flush_cache:
+            try:
+                backends = tuple(probe_backends(flush_cache=True))
+            except TypeError:  # audioread < 3.0 has no cache to flush
+                backends = tuple(probe_backends())
+        return backends
+
+    audioread.available_backends = cached_backends
+    return librosa
+
+
+# Magic bytes of the containers libsndfile decodes natively (WAV, FLAC, OGG, AIFF).
+_SOUNDFILE_MAGIC = (b"RIFF", b"fLaC", b"OggS", b"FORM")
+# Encoded audio handed over in memory rather than as a file object
+_BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+# Sample formats `soundfile.SoundFile.read` can produce directly.
+_SOUNDFILE_DTYPES = ("float64", "float32", "int32", "int16")
+# Encoded files up to this size are decoded once on the second `read_range` of a
+# decoder, and later ranges are sliced from the cached waveform.
+_RANGE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+
+class _DecodePlan(NamedTuple):
+    """Decoding parameters derived once from an :class:`Audio` feature."""
+
+    dtype: str
+    # dtype soundfile reads into before the (possibly no-op) cast to `dtype`
+    read_dtype: str
+    mono: bool
+    sample_rate: Optional[int]
+
+
 class AudioDecoder:
     """Read audio during decoding."""
 
-    def __init__(self, fobj, dtype, shape, sample_rate):
-        self._fobj = fobj
-        self._dtype = dtype
-        self._shape = shape
-        self._sample_rate = sample_rate
-        self._channels = shape[1] if len(shape) > 1 else 1
+    def __init__(self, data, plan: _DecodePlan):
+        self._plan = plan
+        if isinstance(data, _BUFFER_TYPES):
+            # Keep the raw buffer, the file object over it is only created when the
+            # audio is actually read
+            self._raw = data
+            self._fobj = None
+            magic = bytes(data[:4])
+        else:
+            self._raw = None
+            self._fobj = data
+            data.seek(0)
+            magic = data.read(4)
+        # Formats known to libsndfile are decoded with soundfile directly, everything
+        # else (e.g. MP3) goes through librosa/audioread.
+        self._use_soundfile = magic in _SOUNDFILE_MAGIC
+        # Fully decoded `(waveform, sample_rate)` shared by later `read_range` calls
+        self._cache = None
+        self._num_range_reads = 0
+
+    def _rewound(self):
+        """The file object to decode from, positioned at the start."""
+        if self._fobj is None:
+            self._fobj = io.BytesIO(self._raw)
+        else:
+            self._fobj.seek(0)
+        return self._fobj
 
     def read_all(self):
-        self._fobj.seek(0)
+        fobj = self._rewound()
         try:
-            return librosa.load(
-                self._fobj, sr=self._sample_rate, mono=self._channels == 1, dtype=self._dtype
+            if self._use_soundfile:
+                return self._read_soundfile(fobj)
+            plan = self._plan
+            return _load_librosa().load(
+                fobj, sr=plan.sample_rate, mono=plan.mono, dtype=plan.dtype
             )
         except Exception as e:
             logger.error(f"Error reading audio: {e}")
@@ -38,13 +118,34 @@ class AudioDecoder:
         if start > end:
             raise ValueError(f"end must be >= start, got {end} < {start}")
         duration = end - start
-        self._fobj.seek(0)
+        self._num_range_reads += 1
+        if (
+            self._cache is None
+            and self._num_range_reads > 1
+            and self._encoded_size() <= _RANGE_CACHE_MAX_BYTES
+        ):
+            # Once several crops are read from the same file, decode it once and
+            # slice afterwards. A single crop only decodes the range, which is much
+            # cheaper than the whole file.
+            self._cache = self.read_all()
+        if self._cache is not None:
+            y, sr = self._cache
+            if y is None:
+                return None, None
+            # Same frames as seeking, see `_read_soundfile`
+            start_frame = int(start * sr)
+            end_frame = start_frame + int(duration * sr)
+            return y[..., start_frame:end_frame].copy(), sr
+        fobj = self._rewound()
         try:
-            return librosa.load(
-                self._fobj,
-                sr=self._sample_rate,
-                mono=self._channels == 1,
-                dtype=self._dtype,
+            if self._use_soundfile:
+                return self._read_soundfile(fobj, start=start, duration=duration)
+            plan = self._plan
+            return _load_librosa().load(
+                fobj,
+                sr=plan.sample_rate,
+                mono=plan.mono,
+                dtype=plan.dtype,
                 offset=start,
                 duration=duration,
             )
@@ -52,12 +153,49 @@ class AudioDecoder:
             logger.error(f"Error reading audio: {e}")
             return None, None
 
+    def _encoded_size(self):
+        if self._raw is not None:
+            return memoryview(self._raw).nbytes
+        self._fobj.seek(0, io.SEEK_END)
+        return self._fobj.tell()
+
+    def _read_soundfile(
+        self, fobj, start: float = 0.0, duration: Optional[float] = None
+    ):
+        """Decode with libsndfile, mirroring the output layout of `librosa.load`."""
+        plan = self._plan
+        with sf.SoundFile(fobj) as f:
+            sr_native = f.samplerate
+            if start > 0:
+                f.seek(int(start * sr_native))
+            frames = -1 if duration is None else int(duration * sr_native)
+            y = f.read(frames, dtype=plan.read_dtype)
+        if y.ndim > 1:
+            if plan.mono:
+                # Averaged in floating point, integer samples would overflow when
+                # summed in their own dtype. Mono files skip this.
+                y = y.mean(axis=1)
+            else:
+                # soundfile is (frames, channels), librosa is (channels, frames)
+                y = y.T
+        y = y.astype(plan.dtype, copy=False)
+        if plan.sample_rate is None or plan.sample_rate == sr_native:
+            return y, sr_native
+        y = _load_librosa().resample(y, orig_sr=sr_native, target_sr=plan.sample_rate)
+        return y, plan.sample_rate
+
 
 @dataclass
 class Audio(Tensor):
-    """`FeatureConnector` for audio."""
+    """`FeatureConnector` for audio.
+
+    With `lazy_decode=True` (the default) decoding returns an :class:`AudioDecoder` and
+    the waveform is only read on demand, otherwise the `(waveform, sample_rate)` tuple
+    is decoded right away.
+    """
 
     sample_rate: Optional[int]
+    lazy_decode: bool = True
     # Automatically constructed
     _type: str = field(default="Audio", init=False, repr=False)
 
@@ -66,6 +204,14 @@ class Audio(Tensor):
     ):
         super().__init__(shape=shape, dtype=dtype)
         self.sample_rate = sample_rate
+        self.lazy_decode = lazy_decode
+        channels = self.shape[1] if len(self.shape) > 1 else 1
+        self._decode_plan = _DecodePlan(
+            dtype=self.dtype,
+            read_dtype=self.dtype if self.dtype in _SOUNDFILE_DTYPES else "float32",
+            mono=channels == 1,
+            sample_rate=sample_rate,
+        )
 
     def encode_example(self, audio_or_path_or_fobj):
         if isinstance(audio_or_path_or_fobj, (str, os.PathLike)):
@@ -78,9 +224,18 @@ class Audio(Tensor):
             audio = audio_or_path_or_fobj.read()
         return audio
 
+    def _encode_mapped(self, audio_or_path_or_fobj):
+        """Like `encode_example`, but files given by path are memory-mapped instead of
+        read into bytes, for writers which only copy the data. The caller closes the
+        returned `mmap`."""
+        if not isinstance(audio_or_path_or_fobj, (str, os.PathLike)):
+            return self.encode_example(audio_or_path_or_fobj)
+        with open(audio_or_path_or_fobj, "rb") as audio_f:
+            try:
+                return mmap.mmap(audio_f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty files cannot be mapped
+                return b""
+
     def decode_example(self, audio_data):
-        if isinstance(audio_data, bytes):
-            audio_fobj = io.BytesIO(audio_data)
-        else:
-            audio_fobj = audio_data
-        return AudioDecoder(audio_fobj, self.dtype, self.shape, self.sample_rate)
+        decoder = AudioDecoder(audio_data, self._decode_plan)
+        return decoder if self.lazy_decode else decoder.read_all()
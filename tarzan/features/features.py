@@ -1,11 +1,19 @@
 import copy
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import fields
-from functools import wraps
-from typing import Any, Dict
+from typing import AbstractSet, Any, Callable, Dict
 
-from tarzan import features
+import numpy as np
+
+from tarzan.features.audio import Audio
+from tarzan.features.json import Json
+from tarzan.features.scalar import Scalar
 from tarzan.features.sequence import Sequence
-from tarzan.utils import asdict, zip_dict
+from tarzan.features.tensor import Tensor
+from tarzan.features.text import Text
+from tarzan.utils import asdict
 
 
 def encode_nested_example(schema, obj, level=0):
@@ -18,16 +26,15 @@ def encode_nested_example(schema, obj, level=0):
     """
     # Nested structures: we allow dict, list/tuples, sequences
     if isinstance(schema, dict):
-        if level == 0 and obj is None:
-            raise ValueError("Got None but expected a dictionary instead")
-        return (
-            {
-                k: encode_nested_example(sub_schema, sub_obj, level=level + 1)
-                for k, (sub_schema, sub_obj) in zip_dict(schema, obj)
-            }
-            if obj is not None
-            else None
-        )
+        if obj is None:
+            if level == 0:
+                raise ValueError("Got None but expected a dictionary instead")
+            return None
+        _check_keys(schema.keys(), obj)
+        return {
+            k: encode_nested_example(sub_schema, obj[k], level=level + 1)
+            for k, sub_schema in schema.items()
+        }
 
     elif isinstance(schema, (list, tuple)):
         sub_schema = schema[0]
@@ -44,24 +51,28 @@ def encode_nested_example(schema, obj, level=0):
             return None
         # We allow to reverse list of dict => dict of list for compatibility with tfds
         if isinstance(schema.feature, dict):
-            # dict of list to fill
-            list_dict = {}
             if isinstance(obj, (list, tuple)):
-                # obj is a list of dict
-                for k, dict_tuples in zip_dict(schema.feature, *obj):
-                    list_dict[k] = [
-                        encode_nested_example(dict_tuples[0], o, level=level + 1)
-                        for o in dict_tuples[1:]
-                    ]
+                # obj is a list of dict: preallocate the columns and fill them in a
+                # single pass over the rows
+                keys = schema.feature.keys()
+                list_dict = {k: [None] * len(obj) for k in keys}
+                for i, o in enumerate(obj):
+                    _check_keys(keys, o)
+                    for k, sub_schema in schema.feature.items():
+                        list_dict[k][i] = encode_nested_example(
+                            sub_schema, o[k], level=level + 1
+                        )
                 return list_dict
             else:
                 # obj is a single dict
-                for k, (sub_schema, sub_objs) in zip_dict(schema.feature, obj):
-                    list_dict[k] = [
+                _check_keys(schema.feature.keys(), obj)
+                return {
+                    k: [
                         encode_nested_example(sub_schema, o, level=level + 1)
-                        for o in sub_objs
+                        for o in obj[k]
                     ]
-                return list_dict
+                    for k, sub_schema in schema.feature.items()
+                }
         # schema.feature is not a dict
         if isinstance(obj, str):  # don't interpret a string as a list
             raise ValueError(f"Got a string but expected a list instead: '{obj}'")
@@ -84,14 +95,10 @@ def decode_nested_example(schema, obj):
     """
     # Nested structures: we allow dict, list/tuples, sequences
     if isinstance(schema, dict):
-        return (
-            {
-                k: decode_nested_example(sub_schema, sub_obj)
-                for k, (sub_schema, sub_obj) in zip_dict(schema, obj)
-            }
-            if obj is not None
-            else None
-        )
+        if obj is None:
+            return None
+        _check_keys(schema.keys(), obj)
+        return {k: decode_nested_example(v, obj[k]) for k, v in schema.items()}
     elif isinstance(schema, (list, tuple)):
         sub_schema = schema[0]
         if obj is None:
@@ -115,6 +122,245 @@ def decode_nested_example(schema, obj):
         return schema.decode_example(obj) if obj is not None else None
 
 
+def _check_keys(keys: AbstractSet, obj) -> None:
+    if obj.keys() != keys:
+        raise KeyError(
+            f"Keys {sorted(obj.keys())} do not match features {sorted(keys)}"
+        )
+
+
+def _is_nested(schema) -> bool:
+    return isinstance(schema, (dict, list, tuple, Sequence))
+
+
+# Number of distinct values cached per feature declaring `is_pure`
+_ENCODE_CACHE_SIZE = 1024
+
+
+def _leaf_encoder(schema) -> Callable[[Any], Any]:
+    """`schema.encode_example`, caching encoded values if the feature `is_pure`."""
+    encode = schema.encode_example
+    if not getattr(schema, "is_pure", False):
+        return encode
+    # Typed, so that e.g. True and 1 are cached separately
+    cached_encode = functools.lru_cache(maxsize=_ENCODE_CACHE_SIZE, typed=True)(encode)
+
+    def encode_cached(obj):
+        try:
+            return cached_encode(obj)
+        except TypeError:  # unhashable, e.g. a 0-d array
+            return encode(obj)
+
+    return encode_cached
+
+
+def _child_encoder(schema, level: int) -> Callable[[Any], Any]:
+    """Encoder for a node inside a container.
+
+    Containers check for None themselves before calling it, so leaves are returned as
+    their bound `encode_example`, saving a Python frame per element.
+    """
+    if _is_nested(schema):
+        return _compile_encoder(schema, level=level)
+    return _leaf_encoder(schema)
+
+
+def _child_decoder(schema) -> Callable[[Any], Any]:
+    """Decoder for a node inside a container, see :func:`_child_encoder`."""
+    if _is_nested(schema):
+        return _compile_decoder(schema)
+    return schema.decode_example
+
+
+def _is_plain_tensor(schema) -> bool:
+    """Whether `schema` is a Tensor/Scalar (not a subclass such as Audio)."""
+    return type(schema) in (Tensor, Scalar)
+
+
+def _decode_fixed_size_column(schema, column):
+    """Decode a column of fixed-size tensors with a single :meth:`Tensor.decode_batch`.
+
+    Returns None when the column holds anything but byte strings of the expected size
+    (e.g. None values or streams), in which case it is decoded element-wise.
+    """
+    if not column or not all(type(value) is bytes for value in column):
+        return None
+    if set(map(len, column)) != {schema._nbytes}:
+        return None
+    array = schema.decode_batch(b"".join(column), len(column))
+    # Indexing with an ellipsis keeps 0-d arrays for scalars, like `decode_example`
+    return [array[i, ...] for i in range(len(column))]
+
+
+def _decodes_eagerly(schema) -> bool:
+    """Whether decoding `schema` does real work (e.g. reading audio) worth a thread."""
+    if isinstance(schema, dict):
+        return any(_decodes_eagerly(v) for v in schema.values())
+    elif isinstance(schema, (list, tuple)):
+        return _decodes_eagerly(schema[0])
+    elif isinstance(schema, Sequence):
+        return _decodes_eagerly(schema.feature)
+    return isinstance(schema, Audio) and not schema.lazy_decode
+
+
+def _compile_encoder(schema, level: int = 0) -> Callable[[Any], Any]:
+    """Specialize :func:`encode_nested_example` for a fixed `schema`.
+
+    The schema is walked once and the branch structure is captured in nested closures,
+    so encoding an example no longer re-dispatches on the schema type at every node.
+    """
+    if isinstance(schema, dict):
+        sub_encoders = tuple(
+            (k, _child_encoder(v, level=level + 1)) for k, v in schema.items()
+        )
+        keys = frozenset(schema)
+
+        def encode_dict(obj):
+            if obj is None:
+                if level == 0:
+                    raise ValueError("Got None but expected a dictionary instead")
+                return None
+            if obj.keys() != keys:
+                _check_keys(keys, obj)
+            # A plain loop rather than a comprehension: on Python < 3.12 every
+            # comprehension runs in its own frame, which adds up for nested schemas.
+            encoded = {}
+            for k, encode in sub_encoders:
+                v = obj[k]
+                encoded[k] = None if v is None else encode(v)
+            return encoded
+
+        return encode_dict
+
+    elif isinstance(schema, (list, tuple)):
+        sub_encoder = _child_encoder(schema[0], level=level + 1)
+
+        def encode_list(obj):
+            if obj is None:
+                return None
+            return [None if o is None else sub_encoder(o) for o in obj]
+
+        return encode_list
+
+    elif isinstance(schema, Sequence):
+        if isinstance(schema.feature, dict):
+            sub_encoders = {
+                k: _child_encoder(v, level=level + 1) for k, v in schema.feature.items()
+            }
+            keys = frozenset(sub_encoders)
+
+            def encode_sequence_dict(obj):
+                if obj is None:
+                    return None
+                # We allow to reverse list of dict => dict of list for compatibility with tfds
+                if isinstance(obj, (list, tuple)):
+                    for o in obj:
+                        _check_keys(keys, o)
+                    return {
+                        k: [None if (v := o[k]) is None else encode(v) for o in obj]
+                        for k, encode in sub_encoders.items()
+                    }
+                _check_keys(keys, obj)
+                return {
+                    k: [None if o is None else encode(o) for o in obj[k]]
+                    for k, encode in sub_encoders.items()
+                }
+
+            return encode_sequence_dict
+
+        sub_encoder = _child_encoder(schema.feature, level=level + 1)
+
+        def encode_sequence(obj):
+            if obj is None:
+                return None
+            if isinstance(obj, str):  # don't interpret a string as a list
+                raise ValueError(f"Got a string but expected a list instead: '{obj}'")
+            return [None if o is None else sub_encoder(o) for o in obj]
+
+        return encode_sequence
+
+    else:
+        encode_leaf = _leaf_encoder(schema)
+
+        def encode(obj):
+            return encode_leaf(obj) if obj is not None else None
+
+        return encode
+
+
+def _compile_decoder(schema) -> Callable[[Any], Any]:
+    """Specialize :func:`decode_nested_example` for a fixed `schema`."""
+    if isinstance(schema, dict):
+        sub_decoders = tuple((k, _child_decoder(v)) for k, v in schema.items())
+        keys = frozenset(schema)
+
+        def decode_dict(obj):
+            if obj is None:
+                return None
+            if obj.keys() != keys:
+                _check_keys(keys, obj)
+            # Plain loop for the same reason as in `_compile_encoder`
+            decoded = {}
+            for k, decode in sub_decoders:
+                v = obj[k]
+                decoded[k] = None if v is None else decode(v)
+            return decoded
+
+        return decode_dict
+
+    elif isinstance(schema, (list, tuple)):
+        sub_decoder = _child_decoder(schema[0])
+
+        def decode_list(obj):
+            if obj is None:
+                return None
+            return [None if o is None else sub_decoder(o) for o in obj]
+
+        return decode_list
+
+    elif isinstance(schema, Sequence):
+        # We allow to reverse list of dict => dict of list for compatibility with tfds
+        if isinstance(schema.feature, dict):
+            sub_decoders = {k: _compile_decoder([v]) for k, v in schema.feature.items()}
+
+            def decode_sequence_dict(obj):
+                return {k: decode(obj[k]) for k, decode in sub_decoders.items()}
+
+            return decode_sequence_dict
+        return _compile_decoder([schema.feature])
+
+    else:
+        decode_leaf = schema.decode_example
+
+        def decode(obj):
+            return decode_leaf(obj) if obj is not None else None
+
+        return decode
+
+
+def _clone_schema(schema):
+    """Copy a schema tree: containers are rebuilt, leaf features are shallow-copied.
+
+    Leaf features only hold immutable values (shape tuples, dtype strings, ...), so a
+    shallow copy is as good as `copy.deepcopy` and skips its generic memo machinery.
+    """
+    if isinstance(schema, dict):
+        return {k: _clone_schema(v) for k, v in schema.items()}
+    if isinstance(schema, (list, tuple)):
+        return type(schema)(_clone_schema(v) for v in schema)
+    if isinstance(schema, Sequence):
+        return Sequence(feature=_clone_schema(schema.feature), length=schema.length)
+    return copy.copy(schema)
+
+
+# Maps the serialized `_type` name to the feature class and its dataclass field names,
+# so deserialization does not introspect the dataclass once per node.
+_TYPE_TABLE = {
+    cls.__name__: (cls, frozenset(f.name for f in fields(cls)))
+    for cls in (Audio, Json, Scalar, Sequence, Text, Tensor)
+}
+
+
 def generate_from_dict(obj: Any):
     """Regenerate the nested feature object from a deserialized dict.
     We use the '_type' fields to get the dataclass name to load.
@@ -129,37 +375,16 @@ def generate_from_dict(obj: Any):
     # Otherwise we have a dict or a dataclass
     if "_type" not in obj or isinstance(obj["_type"], dict):
         return {key: generate_from_dict(value) for key, value in obj.items()}
-    class_type = getattr(features, obj.pop("_type"))
+    class_type, field_names = _TYPE_TABLE[obj.pop("_type")]
 
-    if class_type == Sequence:
+    if class_type is Sequence:
         return Sequence(
             feature=generate_from_dict(obj["feature"]), length=obj.get("length", -1)
         )
 
-    field_names = {f.name for f in fields(class_type)}
     return class_type(**{k: v for k, v in obj.items() if k in field_names})
 
 
-def keep_features_dicts_synced(func):
-    """
-    Wrapper to keep the secondary dictionary, which tracks whether keys are decodable, of the :class:`datasets.Features`
-    object in sync with the main dictionary.
-    """
-
-    @wraps(func)
-    def wrapper(*args, **kwargs):
-        if args:
-            self: "Features" = args[0]
-            args = args[1:]
-        else:
-            self: "Features" = kwargs.pop("self")
-        out = func(self, *args, **kwargs)
-        return out
-
-    wrapper._decorator_name_ = "_keep_dicts_synced"
-    return wrapper
-
-
 class Features(dict):
     """A special dictionary that defines the internal structure of a dataset."""
 
@@ -171,14 +396,52 @@ class Features(dict):
             )
         self, *args = args
         super(Features, self).__init__(*args, **kwargs)
+        # Per-column encoders/decoders compiled lazily from the schema
+        self._encoders = None
+        self._decoders = None
+
+    def _invalidate_caches(self):
+        """Drop the compiled encoders/decoders after the schema changed."""
+        self._encoders = None
+        self._decoders = None
+
+    # Mutating dict methods are overridden explicitly (rather than wrapped) so that a
+    # mutation costs a single Python frame on top of the C implementation.
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._invalidate_caches()
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._invalidate_caches()
+
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._invalidate_caches()
+
+    def __ior__(self, other):
+        dict.update(self, other)
+        self._invalidate_caches()
+        return self
+
+    def setdefault(self, key, default=None):
+        out = dict.setdefault(self, key, default)
+        self._invalidate_caches()
+        return out
 
-    __setitem__ = keep_features_dicts_synced(dict.__setitem__)
-    __delitem__ = keep_features_dicts_synced(dict.__delitem__)
-    update = keep_features_dicts_synced(dict.update)
-    setdefault = keep_features_dicts_synced(dict.setdefault)
-    pop = keep_features_dicts_synced(dict.pop)
-    popitem = keep_features_dicts_synced(dict.popitem)
-    clear = keep_features_dicts_synced(dict.clear)
+    def pop(self, *args):
+        out = dict.pop(self, *args)
+        self._invalidate_caches()
+        return out
+
+    def popitem(self):
+        out = dict.popitem(self)
+        self._invalidate_caches()
+        return out
+
+    def clear(self):
+        dict.clear(self)
+        self._invalidate_caches()
 
     def __reduce__(self):
         return Features, (dict(self),)
@@ -212,6 +475,16 @@ class Features(dict):
     def to_dict(self):
         return asdict(self)
 
+    def _get_encoders(self) -> Dict[str, Callable[[Any], Any]]:
+        if self._encoders is None:
+            self._encoders = {k: _compile_encoder(v, level=1) for k, v in self.items()}
+        return self._encoders
+
+    def _get_decoders(self) -> Dict[str, Callable[[Any], Any]]:
+        if self._decoders is None:
+            self._decoders = {k: _compile_decoder(v) for k, v in self.items()}
+        return self._decoders
+
     def encode_example(self, example):
         """
         Encode example into a format for storage.
@@ -223,22 +496,49 @@ class Features(dict):
         Returns:
             `dict[str, Any]`
         """
-        return encode_nested_example(self, example)
+        if example is None:
+            raise ValueError("Got None but expected a dictionary instead")
+        encoders = self._get_encoders()
+        _check_keys(encoders.keys(), example)
+        return {
+            column_name: encode(example[column_name])
+            for column_name, encode in encoders.items()
+        }
 
     def encode_column(self, column, column_name: str):
         """
         Encode column into a format for storage.
 
         Args:
-            column (`list[Any]`):
-                Data in a Dataset column.
+            column (`list[Any]` or `np.ndarray`):
+                Data in a Dataset column. For `Tensor`/`Scalar` columns this may be a
+                single array with the examples stacked along the first axis.
             column_name (`str`):
                 Dataset column name.
 
         Returns:
             `list[Any]`
         """
-        return [encode_nested_example(self[column_name], obj) for obj in column]
+        return self._encode_column(column, column_name)
+
+    def _encode_column(self, column, column_name: str, views: bool = False):
+        """`encode_column`, with stacked tensor columns encoded as `memoryview` slices
+        of a single buffer if `views` is set, for writers which copy them right away."""
+        schema = self[column_name]
+        if (
+            isinstance(column, np.ndarray)
+            and _is_plain_tensor(schema)
+            and column.dtype == schema._np_dtype
+        ):
+            # Examples stacked in a single array are encoded in one go. Other dtypes
+            # are encoded element-wise, casting scalars like `encode_example` does.
+            if views:
+                return schema._encode_batch_views(column)
+            return schema.encode_batch(column)
+        if isinstance(schema, dict) and any(obj is None for obj in column):
+            raise ValueError("Got None but expected a dictionary instead")
+        encode = self._get_encoders()[column_name]
+        return [encode(obj) for obj in column]
 
     def encode_batch(self, batch):
         """
@@ -251,15 +551,17 @@ class Features(dict):
         Returns:
             `dict[str, list[Any]]`
         """
+        return self._encode_batch(batch)
+
+    def _encode_batch(self, batch, views: bool = False):
+        """`encode_batch`, see `_encode_column` for `views`."""
         encoded_batch = {}
-        if set(batch) != set(self):
+        if batch.keys() != self.keys():
             raise ValueError(
                 f"Column mismatch between batch {set(batch)} and features {set(self)}"
             )
         for key, column in batch.items():
-            encoded_batch[key] = [
-                encode_nested_example(self[key], obj) for obj in column
-            ]
+            encoded_batch[key] = self._encode_column(column, key, views)
         return encoded_batch
 
     def decode_example(self, example: Dict):
@@ -272,12 +574,11 @@ class Features(dict):
         Returns:
             `dict[str, Any]`
         """
-
+        # Examples may hold a subset of the columns, unknown columns raise a KeyError
+        decoders = self._get_decoders()
         return {
-            column_name: decode_nested_example(feature, value)
-            for column_name, (feature, value) in zip_dict(
-                {key: value for key, value in self.items() if key in example}, example
-            )
+            column_name: decoders[column_name](value)
+            for column_name, value in example.items()
         }
 
     def decode_column(self, column: list, column_name: str):
@@ -292,18 +593,15 @@ class Features(dict):
         Returns:
             `list[Any]`
         """
-        return [
-            (
-                decode_nested_example(self[column_name], value)
-                if value is not None
-                else None
-            )
-            for value in column
-        ]
+        decode = self._get_decoders()[column_name]
+        return [decode(value) if value is not None else None for value in column]
 
     def decode_batch(self, batch: Dict):
         """Decode batch with custom feature decoding.
 
+        Columns holding eagerly decoded audio are decoded concurrently in a thread
+        pool, soundfile releases the GIL while decoding.
+
         Args:
             batch (`dict[str, list[Any]]`):
                 Dataset batch data.
@@ -312,15 +610,30 @@ class Features(dict):
             `dict[str, list[Any]]`
         """
         decoded_batch = {}
+        threaded_columns = {}
         for column_name, column in batch.items():
-            decoded_batch[column_name] = [
-                (
-                    decode_nested_example(self[column_name], value)
-                    if value is not None
-                    else None
-                )
-                for value in column
-            ]
+            schema = self[column_name]
+            if len(column) > 1 and _decodes_eagerly(schema):
+                threaded_columns[column_name] = column
+                continue
+            if _is_plain_tensor(schema) and schema._nbytes is not None:
+                decoded = _decode_fixed_size_column(schema, column)
+                if decoded is not None:
+                    decoded_batch[column_name] = decoded
+                    continue
+            decoded_batch[column_name] = self.decode_column(column, column_name)
+        if threaded_columns:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                for column_name, column in threaded_columns.items():
+                    decode = self._get_decoders()[column_name]
+                    decoded_batch[column_name] = list(
+                        executor.map(
+                            lambda value, decode=decode: (
+                                decode(value) if value is not None else None
+                            ),
+                            column,
+                        )
+                    )
         return decoded_batch
 
     def copy(self) -> "Features":
@@ -330,4 +643,4 @@ class Features(dict):
         Returns:
             [`Features`]
         """
-        return copy.deepcopy(self)
+        return Features({k: _clone_schema(v) for k, v in self.items()})
@@ -1,7 +1,7 @@
-import json
 from dataclasses import dataclass, field
 
 from tarzan.features.text import Text
+from tarzan.utils import json_dumps, json_loads
 
 
 @dataclass
@@ -10,7 +10,9 @@ class Json(Text):
     _type: str = field(default="Json", init=False, repr=False)
 
     def encode_example(self, example):
-        return super().encode_example(json.dumps(example))
+        # Both backends produce UTF-8 bytes directly, no need to go through `str`
+        return json_dumps(example)
 
     def decode_example(self, example):
-        return json.loads(super().decode_example(example))
+        example = self._read_bytes(example)
+        return None if example is None else json_loads(example)
@@ -10,3 +10,9 @@ class Scalar(Tensor):
 
     def __init__(self, dtype, **kwargs):
         super().__init__(shape=(), dtype=dtype)
+
+    @property
+    def is_pure(self) -> bool:
+        # Labels are often repeated, see `Tensor.is_pure`. Not for floats, since the
+        # cache compares values, and -0.0 == 0.0 would be encoded the same.
+        return self._np_dtype.kind in "biu"
@@ -1,4 +1,7 @@
+import functools
+import math
 from dataclasses import dataclass, field
+from typing import ClassVar
 
 import numpy as np
 from tarzan.utils import StreamWrapper
@@ -10,6 +13,9 @@ class Tensor:
 
     shape: tuple
     dtype: str
+    # Whether encoding only depends on the value, so that encoded values can be
+    # cached. Not worth it for tensors, which are rarely repeated and large.
+    is_pure: ClassVar[bool] = False
     # Automatically constructed
     _type: str = field(default="Tensor", init=False, repr=False)
 
@@ -17,14 +23,31 @@ class Tensor:
         self.shape = tuple(self.shape)
         if not isinstance(self.dtype, str):
             raise TypeError("dtype must be a string")
-        if not is_valid_dtype(self.dtype):
-            raise ValueError("dtype must be a valid dtype for numpy")
+        # Parsed once, comparing dtype objects is much cheaper than against strings
+        try:
+            self._np_dtype = np.dtype(self.dtype)
+        except TypeError:
+            raise ValueError("dtype must be a valid dtype for numpy") from None
+        self._reshape = tuple(-1 if dim is None else dim for dim in self.shape)
+        # Encoded size of an example, None unless the shape is fully defined
+        self._nbytes = (
+            None
+            if None in self.shape
+            else math.prod(self.shape) * self._np_dtype.itemsize
+        )
+        # With a fully defined shape, decoding is a single call constructing the
+        # array on the buffer. A partial (unlike a closure) keeps the feature picklable.
+        self._decode_bytes = (
+            None
+            if self._nbytes is None
+            else functools.partial(np.ndarray, self.shape, self._np_dtype)
+        )
 
     def encode_example(self, example):
         if not isinstance(example, np.ndarray):
-            example = np.asarray(example, dtype=self.dtype)
+            example = np.asarray(example, dtype=self._np_dtype)
         # Ensure the shape and dtype match
-        if example.dtype != self.dtype:
+        if example.dtype != self._np_dtype:
             raise ValueError(
                 "Dtype {} do not match {}".format(example.dtype, self.dtype)
             )
@@ -32,14 +55,62 @@ class Tensor:
         return example.tobytes()
 
     def decode_example(self, example):
+        """Decode the bytes of a tensor.
+
+        The returned array is a view of the data, which is read with a single
+        `read()` for streams, without any copy. It is read-only unless the data is
+        writable (e.g. a `bytearray`), use `.copy()` to get an array to modify.
+        """
+        # Streams are deliberately not read into (reused) preallocated buffers:
+        # tarfile members implement `readinto` as `read` followed by a copy.
         if isinstance(example, StreamWrapper):
             fobj = example
             example = example.read()
             fobj.close()
             if not example:
                 return None
-        shape = [-1 if dim is None else dim for dim in self.shape]
-        return np.frombuffer(example, dtype=self.dtype).reshape(shape)
+        if len(example) == self._nbytes:
+            return self._decode_bytes(example)
+        # Anything else goes through `reshape`, which also rejects sizes that don't fit
+        return np.frombuffer(example, dtype=self._np_dtype).reshape(self._reshape)
+
+    def encode_batch(self, batch):
+        """Encode a batch of examples stacked along the first axis.
+
+        Dtype and shape are validated once for the whole batch, instead of for every
+        example with `encode_example`.
+        """
+        return [bytes(view) for view in self._encode_batch_views(batch)]
+
+    def _encode_batch_views(self, batch):
+        """Like `encode_batch`, but the examples are `memoryview` slices of a single
+        contiguous buffer, for writers which copy them right away."""
+        if not isinstance(batch, np.ndarray):
+            batch = np.asarray(batch, dtype=self._np_dtype)
+        if batch.dtype != self._np_dtype:
+            raise ValueError("Dtype {} do not match {}".format(batch.dtype, self.dtype))
+        if batch.ndim == 0:
+            raise ValueError("Expected a batch of examples stacked along axis 0")
+        assert_shape_match(batch.shape[1:], self.shape)
+        num_examples = len(batch)
+        if not num_examples:
+            return []
+        # A flat byte view, `memoryview.cast` rejects zero-size shapes
+        view = memoryview(np.ascontiguousarray(batch).reshape(-1).view(np.uint8))
+        size = len(view) // num_examples
+        offsets = [i * size for i in range(num_examples + 1)]
+        return [view[start:stop] for start, stop in zip(offsets, offsets[1:])]
+
+    def decode_batch(self, buffer, num_examples: int):
+        """Decode `num_examples` examples concatenated in `buffer` into a stacked array.
+
+        Only supported for fully defined shapes, the result aliases `buffer`.
+        """
+        if self._nbytes is None:
+            raise ValueError(f"Shape {self.shape} must be fully defined")
+        return np.frombuffer(buffer, dtype=self._np_dtype).reshape(
+            (num_examples, *self.shape)
+        )
 
 
 class Dimension:
@@ -242,25 +313,36 @@ def as_dimension(value):
         return Dimension(value)
 
 
+def _dim_value(value):
+    """Validate a dimension like :class:`Dimension` does and return its int/None value."""
+    if value is None or (type(value) is int and value >= 0):  # Most common case.
+        return value
+    return Dimension(value).value
+
+
 class TensorShape:
+    # Dimensions are stored as a tuple of int/None values (or None for an unknown
+    # rank), `Dimension` objects are only created when requested through the API.
+    __slots__ = ["_values"]
+
     def __init__(self, dims):
         if isinstance(dims, (tuple, list)):  # Most common case.
-            self._dims = [Dimension(d) for d in dims]
+            self._values = tuple(_dim_value(d) for d in dims)
         elif dims is None:
-            self._dims = None
+            self._values = None
         elif isinstance(dims, TensorShape):
-            self._dims = dims.dims
+            self._values = dims._values
         else:
             try:
                 dims_iter = iter(dims)
             except TypeError:
                 # Treat as a singleton dimension
-                self._dims = [as_dimension(dims)]
+                self._values = (_dim_value(dims),)
             else:
-                self._dims = []
+                values = []
                 for d in dims_iter:
                     try:
-                        self._dims.append(as_dimension(d))
+                        values.append(_dim_value(d))
                     except TypeError as e:
                         raise TypeError(
                             "Failed to convert '{0!r}' to a shape: '{1!r}'"
@@ -268,52 +350,56 @@ class TensorShape:
                             "either be single dimension (e.g. 10), or an iterable of "
                             "dimensions (e.g. [1, 10, None]).".format(dims, d)
                         ) from e
+                self._values = tuple(values)
 
     def __repr__(self):
-        return "TensorShape(%r)" % self._dims
+        return "TensorShape(%r)" % self.dims
 
     def __str__(self):
         if self.rank is None:
             return "<unknown>"
-        elif self.rank == 1:
-            return "(%s,)" % self._dims[0]
+        values = ["?" if v is None else str(v) for v in self._values]
+        if self.rank == 1:
+            return "(%s,)" % values[0]
         else:
-            return "(%s)" % ", ".join(str(d) for d in self._dims)
+            return "(%s)" % ", ".join(values)
 
     @property
     def rank(self):
-        if self._dims is not None:
-            return len(self._dims)
+        if self._values is not None:
+            return len(self._values)
         return None
 
     @property
     def dims(self):
-        return self._dims
+        if self._values is None:
+            return None
+        return [Dimension(v) for v in self._values]
 
     @property
     def ndims(self):
         return self.rank
 
     def __len__(self):
-        if self._dims is None:
+        if self._values is None:
             raise ValueError("Cannot take the length of shape with unknown rank.")
-        return len(self._dims)
+        return len(self._values)
 
     def __bool__(self):
-        return self._dims is not None
+        return self._values is not None
 
     def __iter__(self):
-        if self._dims is None:
+        if self._values is None:
             raise ValueError("Cannot iterate over a shape with unknown rank.")
         else:
-            return iter(d for d in self._dims)
+            return iter(self.dims)
 
     def __getitem__(self, key):
-        if self._dims is not None:
+        if self._values is not None:
             if isinstance(key, slice):
-                return TensorShape(self._dims[key])
+                return TensorShape(self._values[key])
             else:
-                return self._dims[key]
+                return Dimension(self._values[key])
         else:
             if isinstance(key, slice):
                 start = key.start if key.start is not None else 0
@@ -333,25 +419,25 @@ class TensorShape:
     def num_elements(self):
         if self.is_fully_defined():
             size = 1
-            for dim in self._dims:
-                size *= dim.value
+            for value in self._values:
+                size *= value
             return size
         else:
             return None
 
     def merge_with(self, other):
         other = as_shape(other)
-        if self._dims is None:
+        if self._values is None:
             return other
-        else:
-            try:
-                self.assert_same_rank(other)
-                new_dims = []
-                for i, dim in enumerate(self._dims):
-                    new_dims.append(dim.merge_with(other[i]))
-                return TensorShape(new_dims)
-            except ValueError:
-                raise ValueError("Shapes %s and %s are not compatible" % (self, other))
+        if other._values is None:
+            return TensorShape(self._values)
+        if len(self._values) != len(other._values) or not _compatible(
+            self._values, other._values
+        ):
+            raise ValueError("Shapes %s and %s are not compatible" % (self, other))
+        return TensorShape(
+            tuple(y if x is None else x for x, y in zip(self._values, other._values))
+        )
 
     def __add__(self, other):
         if not isinstance(other, TensorShape):
@@ -365,10 +451,10 @@ class TensorShape:
 
     def concatenate(self, other):
         other = as_shape(other)
-        if self._dims is None or other.dims is None:
+        if self._values is None or other._values is None:
             return unknown_shape()
         else:
-            return TensorShape(self._dims + other.dims)
+            return TensorShape(self._values + other._values)
 
     def assert_same_rank(self, other):
         other = as_shape(other)
@@ -402,12 +488,10 @@ class TensorShape:
 
     def is_compatible_with(self, other):
         other = as_shape(other)
-        if self._dims is not None and other.dims is not None:
-            if self.rank != other.rank:
+        if self._values is not None and other._values is not None:
+            if len(self._values) != len(other._values):
                 return False
-            for x_dim, y_dim in zip(self._dims, other.dims):
-                if not x_dim.is_compatible_with(y_dim):
-                    return False
+            return _compatible(self._values, other._values)
         return True
 
     def assert_is_compatible_with(self, other):
@@ -416,36 +500,41 @@ class TensorShape:
 
     def most_specific_compatible_shape(self, other):
         other = as_shape(other)
-        if self._dims is None or other.dims is None or self.rank != other.rank:
+        if self._values is None or other._values is None or self.rank != other.rank:
             return unknown_shape()
-
-        dims = [(Dimension(None))] * self.rank
-        for i, (d1, d2) in enumerate(zip(self._dims, other.dims)):
-            if d1 is not None and d2 is not None and d1 == d2:
-                dims[i] = d1
-        return TensorShape(dims)
+        return TensorShape(
+            tuple(
+                x if x is not None and x == y else None
+                for x, y in zip(self._values, other._values)
+            )
+        )
 
     def is_fully_defined(self):
-        return self._dims is not None and all(
-            dim.value is not None for dim in self._dims
-        )
+        return self._values is not None and None not in self._values
 
     def assert_is_fully_defined(self):
         if not self.is_fully_defined():
             raise ValueError("Shape %s is not fully defined" % self)
 
     def as_list(self):
-        if self._dims is None:
+        if self._values is None:
             raise ValueError("as_list() is not defined on an unknown TensorShape.")
-        return [dim.value for dim in self._dims]
+        return list(self._values)
 
     def __eq__(self, other):
-        """Returns True if `self` is equivalent to `other`."""
+        """Returns True if `self` is equivalent to `other`.
+
+        Like :class:`Dimension`, an unknown dimension is not equal to anything.
+        """
         try:
             other = as_shape(other)
         except TypeError:
             return NotImplemented
-        return self._dims == other.dims
+        if self._values is None or other._values is None:
+            return self._values is other._values
+        return len(self._values) == len(other._values) and all(
+            x is not None and x == y for x, y in zip(self._values, other._values)
+        )
 
     def __ne__(self, other):
         try:
@@ -454,17 +543,23 @@ class TensorShape:
             return NotImplemented
         if self.rank is None or other.rank is None:
             raise ValueError("The inequality of unknown TensorShapes is undefined.")
-        if self.rank != other.rank:
-            return True
-        return self._dims != other.dims
+        return not self == other
 
     def __reduce__(self):
-        return TensorShape, (self._dims,)
+        return TensorShape, (self._values,)
 
     def __concat__(self, other):
         return self.concatenate(other)
 
 
+def _compatible(values1, values2):
+    """Whether two int/None tuples of the same rank agree on all known dimensions."""
+    for x, y in zip(values1, values2):
+        if x is not None and y is not None and x != y:
+            return False
+    return True
+
+
 def as_shape(shape):
     if isinstance(shape, TensorShape):
         return shape
@@ -480,7 +575,7 @@ def unknown_shape(rank=None, **kwargs):
     if rank is None:
         return TensorShape(None)
     else:
-        return TensorShape([Dimension(None)] * rank)
+        return TensorShape((None,) * rank)
 
 
 def assert_shape_match(shape1, shape2):
@@ -490,6 +585,11 @@ def assert_shape_match(shape1, shape2):
       shape1 (tuple): Static shape
       shape2 (tuple): Dynamic shape (can contain None)
     """
+    # Fast path for the usual `(ndarray.shape, feature.shape)` tuples, the shapes are
+    # only built (and validated) to report an error.
+    if type(shape1) is tuple and type(shape2) is tuple:
+        if len(shape1) == len(shape2) and _compatible(shape1, shape2):
+            return
     shape1 = TensorShape(shape1)
     shape2 = TensorShape(shape2)
     if shape1.ndims is None or shape2.ndims is None:
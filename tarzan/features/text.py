@@ -8,14 +8,21 @@ class Text:
     # Automatically constructed
     _type: str = field(default="Text", init=False, repr=False)
 
-    def encode_example(self, example):
-        return example.encode("utf-8")
-
-    def decode_example(self, example):
+    @staticmethod
+    def _read_bytes(example):
+        """Return the raw bytes of `example`, or None for an empty stream."""
         if isinstance(example, StreamWrapper):
             fobj = example
             example = example.read()
             fobj.close()
             if not example:
                 return None
-        return example.decode("utf-8")
+        return example
+
+    def encode_example(self, example):
+        return example.encode("utf-8")
+
+    def decode_example(self, example):
+        example = self._read_bytes(example)
+        # `str` also accepts memoryviews, e.g. members sliced from a mapped tar file
+        return None if example is None else str(example, "utf-8")
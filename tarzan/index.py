@@ -0,0 +1,32 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+def index_path(tar_path: str) -> str:
+    """Path of the sidecar index written next to `tar_path`."""
+    return f"{tar_path}.idx"
+
+
+def write_index(path: str, index: List[Tuple[str, int, int]]):
+    """Save `(name, offset, size)` rows of tar file members as a structured array."""
+    names = [name.encode("utf-8") for name, _, _ in index]
+    records = np.empty(
+        len(index),
+        dtype=[
+            ("name", f"S{max(map(len, names), default=1)}"),
+            ("offset", "<u8"),
+            ("size", "<u8"),
+        ],
+    )
+    records["name"] = names
+    records["offset"] = [offset for _, offset, _ in index]
+    records["size"] = [size for _, _, size in index]
+    with open(path, "wb") as f:
+        np.save(f, records, allow_pickle=False)
+
+
+def read_index(path: str) -> np.ndarray:
+    """Load an index written by :func:`write_index`."""
+    with open(path, "rb") as f:
+        return np.load(f, allow_pickle=False)
@@ -1,16 +1,52 @@
 import copy
 import dataclasses
-import json
 import logging
+import os
+import sys
 from dataclasses import dataclass
 from typing import Dict, List, Optional
 
 from tarzan.features.features import Features
-from tarzan.utils import asdict, update_dict
+from tarzan.utils import (
+    _IMMUTABLE_TYPES,
+    asdict,
+    json_dumps,
+    json_loads,
+    update_dict,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _pack_file_list(file_list: List[str]):
+    """Factor the directory shared by the shards out of `file_list` for serialization."""
+    prefix = os.path.commonprefix(file_list) if len(file_list) > 1 else ""
+    # Whole directories only, so that shard names stay readable
+    prefix = prefix.rpartition("/")[0] + "/" if "/" in prefix else ""
+    if not prefix:
+        return file_list
+    prefix_len = len(prefix)
+    return {"prefix": prefix, "names": [name[prefix_len:] for name in file_list]}
+
+
+def _unpack_file_list(file_list) -> List[str]:
+    """Inverse of `_pack_file_list`, plain lists are returned as is."""
+    if isinstance(file_list, dict):
+        prefix = file_list["prefix"]
+        return [prefix + name for name in file_list["names"]]
+    return file_list
+
+
+def _shallow_copy(value):
+    """Copy `value`, deeply only if it may hold mutable objects."""
+    if type(value) in _IMMUTABLE_TYPES:
+        return value
+    # e.g. `file_list`, a list of strings
+    if type(value) is list and all(type(v) in _IMMUTABLE_TYPES for v in value):
+        return value[:]
+    return copy.deepcopy(value)
+
+
 @dataclass
 class DatasetInfo:
     """Information about a dataset."""
@@ -22,31 +58,43 @@ class DatasetInfo:
     metadata: Optional[Dict] = None
 
     def __post_init__(self):
+        # Shard names are repeated across data loader workers, share the strings
+        if self.file_list is not None:
+            self.file_list = [
+                sys.intern(name) for name in _unpack_file_list(self.file_list)
+            ]
         # Convert back to the correct classes when we reload from dict
         if self.features is not None and not isinstance(self.features, Features):
             self.features = Features.from_dict(self.features)
 
-    def write_to_json(self, dataset_info_file, pretty_print=False):
+    def write_to_json(
+        self, dataset_info_file, pretty_print=False, pack_file_list=False
+    ):
         """Write `DatasetInfo` and license (if present) as JSON files to `dataset_info_dir`.
 
         Args:
             dataset_info_file (`str`):
                 Destination json file.
             pretty_print (`bool`, defaults to `False`):
-                If `True`, the JSON will be pretty-printed with the indent level of 4.
+                If `True`, the JSON will be pretty-printed with the indent level of 2.
+            pack_file_list (`bool`, defaults to `False`):
+                If `True`, the directory shared by all the files of `file_list` is
+                written once, as `{"prefix": ..., "names": [...]}`. Such file lists
+                can't be read by versions of `tarzan` before this option.
         """
         if self.file_list is None:
             logger.warning(
                 "No file list provided, the dataset info will be incomplete."
             )
         with open(dataset_info_file, "wb") as f:
-            self._dump_info(f, pretty_print=pretty_print)
+            self._dump_info(f, pretty_print=pretty_print, pack_file_list=pack_file_list)
 
-    def _dump_info(self, file, pretty_print=False):
+    def _dump_info(self, file, pretty_print=False, pack_file_list=False):
         """Dump info in `file` file-like object open in bytes mode (to support remote files)"""
-        file.write(
-            json.dumps(asdict(self), indent=4 if pretty_print else None).encode("utf-8")
-        )
+        info_dict = asdict(self)
+        if pack_file_list and info_dict.get("file_list") is not None:
+            info_dict["file_list"] = _pack_file_list(info_dict["file_list"])
+        file.write(json_dumps(info_dict, pretty=pretty_print))
 
     @classmethod
     def from_json(cls, dataset_info_file: str) -> "DatasetInfo":
@@ -62,8 +110,8 @@ class DatasetInfo:
                 The Json file of dataset info.
         """
         logger.info(f"Loading Dataset info from {dataset_info_file}")
-        with open(dataset_info_file, "r", encoding="utf-8") as f:
-            dataset_info_dict = json.load(f)
+        with open(dataset_info_file, "rb") as f:
+            dataset_info_dict = json_loads(f.read())
         return cls.from_dict(dataset_info_dict)
 
     @classmethod
@@ -76,11 +124,11 @@ class DatasetInfo:
         self.__dict__ = update_dict(
             self_dict,
             {
-                k: copy.deepcopy(v)
+                k: _shallow_copy(v)
                 for k, v in other_dataset_info.__dict__.items()
                 if (v is not None or not ignore_none)
             },
         )
 
     def copy(self) -> "DatasetInfo":
-        return self.__class__(**{k: copy.deepcopy(v) for k, v in self.__dict__.items()})
+        return self.__class__(**{k: _shallow_copy(v) for k, v in self.__dict__.items()})
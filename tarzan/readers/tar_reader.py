@@ -1,46 +1,32 @@
+import itertools
 import logging
+import mmap
 import os
 import tarfile
 from typing import Dict, Iterator, List, Optional, Tuple
 
-from more_itertools import peekable
-
 from tarzan.features import Features
+from tarzan.index import index_path, read_index
 from tarzan.info import DatasetInfo
-from tarzan.utils import StreamWrapper
+from tarzan.utils import ZSTD_MAGIC, StreamWrapper, import_zstandard
 
 logger = logging.getLogger(__name__)
 
+# Buffer size of the tar files opened by `TarReader`
+_READ_BUFFER_SIZE = 1 << 20
+
 
 def _get_tar_index(tarinfo: tarfile.TarInfo):
-    return tarinfo.name.split("/")[0]
+    # `partition` only splits at the first separator and avoids building a list
+    return tarinfo.name.partition("/")[0]
 
 
 def _feature_stream(stream: StreamWrapper):
-    peekable_tar = peekable(stream)
-
-    feature_group = []
-
-    while True:
-        # Group successive features with same index prefix
-        try:
-            tarinfo = next(peekable_tar)
-        except StopIteration:
-            break
-        index = _get_tar_index(tarinfo)
-        feature_group.append(tarinfo)
-
-        try:
-            tarinfo = peekable_tar.peek()
-        # Last index case
-        except StopIteration:
-            yield index, _compose_feature(stream, feature_group)
-            break
-
-        # Successive index case
-        if _get_tar_index(tarinfo) != index:
-            yield index, _compose_feature(stream, feature_group)
-            feature_group.clear()
+    """Group successive tar members sharing an index prefix into examples."""
+    # `groupby` has already read the first member of the next group when a group is
+    # composed, which is fine since members are extracted by random access.
+    for index, group in itertools.groupby(stream, key=_get_tar_index):
+        yield index, _compose_feature(stream, list(group))
 
 
 def _get_inner_fobj(tar_stream: StreamWrapper, tarinfo: tarfile.TarInfo):
@@ -55,26 +41,77 @@ def _get_inner_fobj(tar_stream: StreamWrapper, tarinfo: tarfile.TarInfo):
 
 def _compose_feature(tar_stream: StreamWrapper, group: List[tarfile.TarInfo]):
     """Compose feature (maybe nested) with same index prefix."""
-    # Single feature case
-    if len(group) == 1:
+    # Single feature case, nested features may be a single member without the
+    # directory members of the example
+    if len(group) == 1 and "/" not in group[0].name:
         tarinfo = group[0]
         # Single feature must be a file
         assert tarinfo.isfile()
         return _get_inner_fobj(tar_stream, tarinfo)
     # Nested feature case
     else:
-        nested = {}
-        for tarinfo in group:
-            if tarinfo.isdir():
-                continue
-            parts = tarinfo.name.split("/")
-            current_dict = nested
-            for part in parts[1:-1]:
-                if part not in current_dict:
-                    current_dict[part] = {}
-                current_dict = current_dict[part]
-            current_dict[parts[-1]] = _get_inner_fobj(tar_stream, tarinfo)
-        return _transform_dict(nested)
+        return _nest(
+            (tarinfo.name, _get_inner_fobj(tar_stream, tarinfo))
+            for tarinfo in group
+            if not tarinfo.isdir()
+        )
+
+
+def _nest(members):
+    """Nest `(name, value)` pairs of file members by their path below the index."""
+    nested = {}
+    for name, value in members:
+        # List items are keyed by their integer position, parsed once here
+        parts = [int(part) if part.isdigit() else part for part in name.split("/")]
+        current_dict = nested
+        for part in parts[1:-1]:
+            if part not in current_dict:
+                current_dict[part] = {}
+            current_dict = current_dict[part]
+        current_dict[parts[-1]] = value
+    return _transform_dict(nested)
+
+
+def _compose_members(group):
+    """Compose a feature from `(name, value)` pairs of members with the same index."""
+    # Single feature case
+    if len(group) == 1 and "/" not in group[0][0]:
+        return group[0][1]
+    return _nest(group)
+
+
+def _indexed_feature_stream(buffer: memoryview, records):
+    """Like :func:`_feature_stream`, but slices members out of `buffer` (the mapped
+    tar file) at the offsets of a sidecar index. Empty members become None."""
+    names = [name.decode("utf-8") for name in records["name"].tolist()]
+    offsets = records["offset"]
+    ends = offsets + records["size"]
+    members = zip(names, offsets.tolist(), ends.tolist())
+    for index, group in itertools.groupby(
+        members, key=lambda member: member[0].partition("/")[0]
+    ):
+        group = [
+            (name, buffer[offset:end] if end > offset else None)
+            for name, offset, end in group
+        ]
+        yield index, _compose_members(group)
+
+
+def _sequential_feature_stream(tar: tarfile.TarFile):
+    """Like :func:`_feature_stream`, for tars opened in a streaming mode (e.g. `r|`).
+
+    Members can't be extracted once the tar is read past them, so they are read as
+    they are reached. Empty members become None, as in :func:`_indexed_feature_stream`.
+    """
+    members = (
+        (tarinfo.name, tar.extractfile(tarinfo).read() or None)
+        for tarinfo in tar
+        if tarinfo.isfile()
+    )
+    for index, group in itertools.groupby(
+        members, key=lambda member: member[0].partition("/")[0]
+    ):
+        yield index, _compose_members(list(group))
 
 
 def _transform_dict(input_dict):
@@ -84,49 +121,93 @@ def _transform_dict(input_dict):
         if isinstance(value, dict):
             value = _transform_dict(value)
         result_dict[key] = value
-    if all(key.isdigit() for key in result_dict.keys()):
-        result_dict = [
-            value
-            for key, value in sorted(result_dict.items(), key=lambda item: int(item[0]))
-        ]
+    if all(type(key) is int for key in result_dict):
+        result_dict = [result_dict[key] for key in sorted(result_dict)]
 
     return result_dict
 
 
 class TarReader:
+    """Iterate over the examples stored in tar files.
+
+    Args:
+        tar_files (`list[str]`):
+            Tar files to read, in order.
+        features ([`Features`]):
+            Features used to decode the examples.
+        mode (`str`, defaults to `"r:*"`):
+            Mode passed to `tarfile.open`. Members of an example are read after the
+            tar has been scanned past them, so the file has to be seekable and
+            streaming modes such as `"r|*"` are not supported. Tar files compressed
+            with zstd (see [`TarWriter`]) are detected, and read sequentially.
+        use_index (`bool`, defaults to `False`):
+            If `True`, read the sidecar `<tar_file>.idx` written by
+            `TarWriter(write_index=True)` and decode members straight from the
+            memory-mapped tar file instead of parsing it with `tarfile`. Members are
+            then passed to the features as `memoryview`s rather than streams.
+    """
+
     def __init__(
         self,
         tar_files: List[str],
         features: Features,
         mode: str = "r:*",
+        use_index: bool = False,
     ) -> None:
         super().__init__()
         self.tar_files = tar_files
         self.features = features
         self.mode = mode
+        self.use_index = use_index
 
     @classmethod
-    def from_dataset_info(cls, dataset_info_file: str) -> "TarReader":
+    def from_dataset_info(
+        cls, dataset_info_file: str, use_index: bool = False
+    ) -> "TarReader":
         info = DatasetInfo.from_json(dataset_info_file)
         data_dir = os.path.dirname(dataset_info_file)
         tar_files = [os.path.join(data_dir, f) for f in info.file_list]
-        return cls(tar_files=tar_files, features=info.features)
+        return cls(tar_files=tar_files, features=info.features, use_index=use_index)
+
+    def _iter_indexed(self, tar_file: str) -> Iterator[Tuple[str, str, Dict]]:
+        records = read_index(index_path(tar_file))
+        with open(tar_file, "rb") as f:
+            # The mapping stays valid after the file is closed, and is released once
+            # the last view into it (e.g. a decoded tensor) is gone.
+            buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        decode = self.features.decode_example
+        for index, example in _indexed_feature_stream(buffer, records):
+            yield tar_file, index, decode(example)
+
+    def _iter_zstd(self, tar_file: str, raw) -> Iterator[Tuple[str, str, Dict]]:
+        zstandard = import_zstandard()
+        decode = self.features.decode_example
+        with raw, zstandard.ZstdDecompressor().stream_reader(raw) as stream:
+            with tarfile.open(fileobj=stream, mode="r|") as tar:
+                for index, example in _sequential_feature_stream(tar):
+                    yield tar_file, index, decode(example)
 
     def __iter__(self) -> Iterator[Tuple[str, str, Dict]]:
         for tar_file in self.tar_files:
+            if self.use_index:
+                yield from self._iter_indexed(tar_file)
+                continue
+            # A large buffer turns the many small header and member reads into few
+            # syscalls. The raw file is closed along with the last stream using it.
+            raw = open(tar_file, "rb", buffering=_READ_BUFFER_SIZE)
+            if raw.peek(len(ZSTD_MAGIC))[: len(ZSTD_MAGIC)] == ZSTD_MAGIC:
+                yield from self._iter_zstd(tar_file, raw)
+                continue
+            raw_stream = StreamWrapper(raw, name=tar_file)
             tar_stream = StreamWrapper(
-                tarfile.open(tar_file, self.mode),
+                tarfile.open(fileobj=raw_stream.file_obj, mode=self.mode),
+                raw_stream,
                 name=tar_file,
             )
-            example_stream = _feature_stream(tar_stream)
-
+            raw_stream.autoclose()
+            decode = self.features.decode_example
             try:
-                while True:
-                    try:
-                        index, example = next(example_stream)
-                    except StopIteration:
-                        break
-                    decoded_example = self.features.decode_example(example)
-                    yield tar_file, index, decoded_example
+                for index, example in _feature_stream(tar_stream):
+                    yield tar_file, index, decode(example)
             finally:
                 tar_stream.autoclose()
@@ -1,9 +1,104 @@
-import collections
 import copy
 import itertools
+import json
+import math
+import re
 from dataclasses import fields, is_dataclass
 from typing import Dict, Any
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib
+    orjson = None
+
+
+def _stdlib_json_dumps(obj, pretty: bool = False) -> bytes:
+    # Same output as orjson, which only supports an indent of 2
+    kwargs = {"indent": 2} if pretty else {"separators": (",", ":")}
+    try:
+        return json.dumps(obj, ensure_ascii=False, **kwargs).encode()
+    except UnicodeEncodeError:
+        # Lone surrogates can't be encoded to UTF-8, but can be escaped
+        return json.dumps(obj, **kwargs).encode()
+
+
+def _stdlib_json_loads(data):
+    # Unlike orjson, the stdlib does not accept memoryviews
+    return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+
+def _has_non_finite_float(obj) -> bool:
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, float):
+            if not math.isfinite(obj):
+                return True
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+    return False
+
+
+# JSON to/from UTF-8 bytes, compact unless `pretty`, with orjson when it is installed.
+# Values orjson would change are handled by the stdlib instead, so that both backends
+# round trip the same values.
+if orjson is not None:
+    # Types the stdlib doesn't serialize natively (datetimes, dataclasses) or only
+    # through their base type (subclasses of int, float...) are left to the stdlib
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+        | orjson.OPT_PASSTHROUGH_SUBCLASS
+    )
+    # orjson reads integers beyond 64 bits as floats
+    _LONG_NUMBER = re.compile(rb"\d{20}")
+
+    def json_dumps(obj, pretty: bool = False) -> bytes:
+        option = _ORJSON_OPTIONS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            data = orjson.dumps(obj, option=option)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib handles
+            return _stdlib_json_dumps(obj, pretty)
+        # orjson writes NaN and infinities as null
+        if b"null" in data and _has_non_finite_float(obj):
+            return _stdlib_json_dumps(obj, pretty)
+        return data
+
+    def json_loads(data):
+        if _LONG_NUMBER.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # e.g. NaN and infinities, which orjson doesn't accept
+                pass
+        return _stdlib_json_loads(data)
+
+else:
+    json_dumps = _stdlib_json_dumps
+    json_loads = _stdlib_json_loads
+
+
+# Magic number starting a zstd frame
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def import_zstandard():
+    """Import `zstandard`, which is only needed for zstd compressed tar files."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstd compressed tar files require the `zstandard` package, install it "
+            "with `pip install tarzan[zstd]`"
+        ) from None
+    return zstandard
+
 
 def zip_dict(*dicts):
     """Iterate over items of dictionaries grouped by their keys."""
@@ -13,14 +108,43 @@ def zip_dict(*dicts):
 
 
 def update_dict(d, u):
-    for k, v in u.items():
-        if isinstance(v, collections.abc.Mapping):
-            d[k] = update_dict(d.get(k, {}), v)
-        else:
-            d[k] = v
+    """Recursively update `d` with `u`, merging nested dicts instead of replacing them."""
+    # Iterative walk over `(destination, source)` pairs of nested dicts
+    stack = [(d, u)]
+    while stack:
+        dst, src = stack.pop()
+        for k, v in src.items():
+            if isinstance(v, dict):
+                dst[k] = sub_dst = dst.get(k, {})
+                stack.append((sub_dst, v))
+            else:
+                dst[k] = v
     return d
 
 
+# Leaf types `asdict` returns as is, copying them would be a no-op
+_IMMUTABLE_TYPES = frozenset({str, int, float, bool, bytes, type(None)})
+
+# Per-class `(name, init, default, always_include)` tuples used by `asdict`
+_ASDICT_FIELDS: Dict[type, tuple] = {}
+
+
+def _asdict_fields(cls):
+    try:
+        return _ASDICT_FIELDS[cls]
+    except KeyError:
+        cls_fields = _ASDICT_FIELDS[cls] = tuple(
+            (
+                f.name,
+                f.init,
+                f.default,
+                f.metadata.get("include_in_asdict_even_if_is_default", False),
+            )
+            for f in fields(cls)
+        )
+        return cls_fields
+
+
 def asdict(obj):
     """Convert an object to its dictionary representation recursively.
 
@@ -36,14 +160,10 @@ def asdict(obj):
     def _asdict_inner(obj):
         if _is_dataclass_instance(obj):
             result = {}
-            for f in fields(obj):
-                value = _asdict_inner(getattr(obj, f.name))
-                if (
-                    not f.init
-                    or value != f.default
-                    or f.metadata.get("include_in_asdict_even_if_is_default", False)
-                ):
-                    result[f.name] = value
+            for name, init, default, always_include in _asdict_fields(type(obj)):
+                value = _asdict_inner(getattr(obj, name))
+                if not init or value != default or always_include:
+                    result[name] = value
             return result
         elif isinstance(obj, tuple) and hasattr(obj, "_fields"):
             # obj is a namedtuple
@@ -55,6 +175,8 @@ def asdict(obj):
             return type(obj)(_asdict_inner(v) for v in obj)
         elif isinstance(obj, dict):
             return {_asdict_inner(k): _asdict_inner(v) for k, v in obj.items()}
+        elif type(obj) in _IMMUTABLE_TYPES:
+            return obj
         else:
             return copy.deepcopy(obj)
 
@@ -71,11 +193,30 @@ class StreamWrapper:
     StreamWrapper would guarantee the wrapped file handler is closed when it's out of scope.
     """
 
+    # Methods of the wrapped object read per tar member, bound as instance attributes
+    # at construction so that they don't go through `__getattr__`
+    _BOUND_METHODS = ("read", "readinto", "extractfile")
+
+    __slots__ = (
+        "file_obj",
+        "child_counter",
+        "parent_stream",
+        "close_on_last_child",
+        "name",
+        "closed",
+        "__weakref__",
+    ) + _BOUND_METHODS
+
     session_streams: Dict[Any, int] = {}
     debug_unclosed_streams: bool = False
 
     def __init__(self, file_obj, parent_stream=None, name=None):
         self.file_obj = file_obj
+        for method in self._BOUND_METHODS:
+            # Left unset when missing, so that the lookup still raises AttributeError
+            bound = getattr(file_obj, method, None)
+            if bound is not None:
+                setattr(self, method, bound)
         self.child_counter = 0
         self.parent_stream = parent_stream
         self.close_on_last_child = False
@@ -92,21 +233,28 @@ class StreamWrapper:
     @classmethod
     def close_streams(cls, v, depth=0):
         """Traverse structure and attempts to close all found StreamWrappers on best effort basis."""
-        if depth > 10:
-            return
-        if isinstance(v, StreamWrapper):
-            v.close()
-        else:
-            # Traverse only simple structures
-            if isinstance(v, dict):
-                for vv in v.values():
-                    cls.close_streams(vv, depth=depth + 1)
-            elif isinstance(v, (list, tuple)):
-                for vv in v:
-                    cls.close_streams(vv, depth=depth + 1)
+        # Iterative walk over the containers found at each depth, within the same limit
+        level = [v]
+        while level and depth <= 10:
+            containers = []
+            for v in level:
+                if type(v) in _IMMUTABLE_TYPES:
+                    continue
+                if isinstance(v, StreamWrapper):
+                    v.close()
+                # Traverse only simple structures
+                elif isinstance(v, dict):
+                    containers.extend(v.values())
+                elif isinstance(v, (list, tuple)):
+                    containers.extend(v)
+            level = containers
+            depth += 1
 
     def __getattr__(self, name):
-        file_obj = self.__dict__['file_obj']
+        try:
+            file_obj = object.__getattribute__(self, "file_obj")
+        except AttributeError:  # not initialized yet, e.g. while unpickling
+            raise AttributeError(name) from None
         return getattr(file_obj, name)
 
     def close(self, *args, **kwargs):
@@ -131,7 +279,8 @@ class StreamWrapper:
             self.close()
 
     def __dir__(self):
-        attrs = list(self.__dict__.keys()) + list(StreamWrapper.__dict__.keys())
+        attrs = [attr for attr in self.__slots__ if hasattr(self, attr)]
+        attrs += list(StreamWrapper.__dict__.keys())
         attrs += dir(self.file_obj)
         return list(set(attrs))
 
@@ -155,4 +304,4 @@ class StreamWrapper:
         return self.file_obj
 
     def __setstate__(self, obj):
-        self.file_obj = obj
+        StreamWrapper.__init__(self, obj)
@@ -1,2 +1,3 @@
-from tarzan.writers.tar_writer import TarWriter
+from tarzan.writers.parallel_shard_writer import ParallelShardWriter
 from tarzan.writers.shard_writer import ShardWriter
+from tarzan.writers.tar_writer import TarWriter
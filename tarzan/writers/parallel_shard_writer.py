@@ -0,0 +1,127 @@
+import logging
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from tarzan.info import DatasetInfo
+from tarzan.writers.base_writer import Writer
+from tarzan.writers.tar_writer import _IDX_STRS, _NUM_IDX_STRS, TarWriter
+
+logger = logging.getLogger(__name__)
+
+# Set in every worker process by `_init_worker`, so that they are sent only once
+_worker_features = None
+_worker_write_index = False
+
+
+def _init_worker(features, write_index):
+    global _worker_features, _worker_write_index
+    _worker_features = features
+    _worker_write_index = write_index
+
+
+def _write_shard(fname, examples):
+    with TarWriter(
+        fname,
+        features=_worker_features,
+        write_index=_worker_write_index,
+        assume_monotonic_idx=True,
+    ) as writer:
+        for i, example in enumerate(examples):
+            writer.write(_IDX_STRS[i] if i < _NUM_IDX_STRS else str(i), example)
+    return fname
+
+
+class ParallelShardWriter(Writer):
+    """Like [`ShardWriter`], but shards are encoded and written by worker processes.
+
+    Examples are buffered in chunks of `max_count`, and every chunk is written to its
+    own shard by a process pool. Shards are numbered and listed in the dataset info in
+    the order the examples were written, as with [`ShardWriter`].
+
+    Args:
+        path (`str`):
+            Destination directory.
+        info ([`DatasetInfo`]):
+            Dataset info, its `features` are used to encode the examples.
+        pattern (`str`, defaults to `"%05d"`):
+            Pattern of the shard file names.
+        max_count (`int`, defaults to `1000`):
+            Number of examples per shard. Unlike [`ShardWriter`], shards are not
+            split by size, since that is only known once the shard is written.
+        write_index (`bool`, defaults to `False`):
+            Write a sidecar index next to every shard, see [`TarWriter`].
+        num_workers (`int`, *optional*):
+            Number of worker processes, defaults to the number of CPUs.
+    """
+
+    DATASET_INFO_FILENAME = "dataset_info.json"
+
+    def __init__(
+        self,
+        path: str,
+        info: DatasetInfo,
+        pattern: str = "%05d",
+        max_count: int = 1000,
+        write_index: bool = False,
+        num_workers: Optional[int] = None,
+    ):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+        self.pattern = f"{path}/{pattern}.tar"
+        self.info = info
+        self.max_count = max_count
+        self.num_workers = num_workers or os.cpu_count() or 1
+
+        self.shard = 0
+        self.total_count = 0
+        self._examples = []
+        # Shards being written, in order. Bounded so that buffered examples don't
+        # pile up when the workers can't keep up with the producer.
+        self._pending = deque()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_worker,
+            initargs=(info.features, write_index),
+        )
+
+    def write(self, obj):
+        self._examples.append(obj)
+        self.total_count += 1
+        if len(self._examples) >= self.max_count:
+            self._submit()
+
+    def _submit(self):
+        fname = self.pattern % self.shard
+        self.shard += 1
+        self._pending.append(self._executor.submit(_write_shard, fname, self._examples))
+        self._examples = []
+        while len(self._pending) > 2 * self.num_workers:
+            self._finish_oldest()
+
+    def _finish_oldest(self):
+        fname = self._pending.popleft().result()
+        self.info.file_list.append(os.path.basename(fname))
+
+    def close(self):
+        """Write the remaining examples, wait for all shards, then write the dataset
+        info."""
+        if self._examples:
+            self._submit()
+        try:
+            while self._pending:
+                self._finish_oldest()
+        finally:
+            # Shards not started yet are dropped when one fails (`shutdown` only takes
+            # `cancel_futures` from Python 3.9 on)
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+        logger.info(
+            f"{self.total_count} examples have been written to {self.shard} shards"
+        )
+        self.info.write_to_json(
+            f"{self.path}/{self.DATASET_INFO_FILENAME}", pretty_print=True
+        )
@@ -1,9 +1,10 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from tarzan.info import DatasetInfo
 from tarzan.writers.base_writer import Writer
-from tarzan.writers.tar_writer import TarWriter
+from tarzan.writers.tar_writer import _IDX_STRS, _NUM_IDX_STRS, TarWriter
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +18,8 @@ class ShardWriter(Writer):
                  info: DatasetInfo,
                  pattern: str = "%05d",
                  max_count: int = 1000,
-                 max_size: int = 3e9):
+                 max_size: int = 3e9,
+                 write_index: bool = False):
         self.path = path
         os.makedirs(path, exist_ok=True)
 
@@ -25,39 +27,108 @@ class ShardWriter(Writer):
         self.info = info
         self.max_count = max_count
         self.max_size = max_size
+        self.write_index = write_index
 
         self.writer_stream = None
+        # Counters are plain ints: packing them into a numpy array was measured ~4x
+        # slower per example, boxing numpy scalars costs more than attribute stores
         self.shard = 0
         self.count = 0
         self.size = 0
         self.total_count = 0
         self.fname = None
+        # Finished shards are closed (i.e. flushed) in the background while the
+        # next one is written, `close` waits for them
+        self._closer = ThreadPoolExecutor(max_workers=1)
+        self._pending = []
         self.next_stream()
 
     def next_stream(self):
         self.finish()
         self.fname = self.pattern % self.shard
         self.shard += 1
-        self.writer_stream = TarWriter(self.fname, features=self.info.features)
+        self.writer_stream = TarWriter(
+            self.fname,
+            features=self.info.features,
+            write_index=self.write_index,
+            assume_monotonic_idx=True,
+        )
         self.count = 0
         self.size = 0
 
     def write(self, obj):
         if self.writer_stream is None or self.count >= self.max_count or self.size > self.max_size:
             self.next_stream()
-        size = self.writer_stream.write(str(self.count), obj)
+        count = self.count
+        idx = _IDX_STRS[count] if count < _NUM_IDX_STRS else str(count)
+        size = self.writer_stream.write(idx, obj)
         self.count += 1
         self.size += size
         self.total_count += 1
 
+    def write_many(self, objs):
+        """Write every example of the iterable `objs`, like calling `write` on each.
+
+        The shard counters are kept in local variables and only stored back when
+        rotating shards and at the end, saving attribute accesses per example.
+        """
+        self._write_many(objs, "write")
+
+    def write_batch(self, batch):
+        """Write a batch of examples given as columns (`dict[str, list]`).
+
+        The columns are encoded like [`Features.encode_batch`], so that e.g. a
+        tensor column given as a single stacked array is encoded in one go, and
+        written from slices of the array's buffer without a copy per example.
+        """
+        encoded_batch = self.info.features._encode_batch(batch, views=True)
+        keys = list(encoded_batch)
+        columns = list(encoded_batch.values())
+        if len(set(map(len, columns))) > 1:
+            raise ValueError("Columns of the batch must have the same length")
+        self._write_many(
+            (dict(zip(keys, values)) for values in zip(*columns)), "write_encoded"
+        )
+
+    def _write_many(self, objs, method: str):
+        max_count = self.max_count
+        max_size = self.max_size
+        count = self.count
+        size = self.size
+        written = 0
+        write = None
+        if self.writer_stream is not None:
+            write = getattr(self.writer_stream, method)
+        try:
+            for obj in objs:
+                if write is None or count >= max_count or size > max_size:
+                    self.next_stream()
+                    count = size = 0
+                    write = getattr(self.writer_stream, method)
+                idx = _IDX_STRS[count] if count < _NUM_IDX_STRS else str(count)
+                size += write(idx, obj)
+                count += 1
+                written += 1
+        finally:
+            self.count = count
+            self.size = size
+            self.total_count += written
+
     def finish(self):
+        """Close the current shard in the background, see `close`."""
         if self.writer_stream is not None:
-            self.writer_stream.close()
+            self._pending.append(self._closer.submit(self.writer_stream.close))
             assert self.fname is not None
             self.info.file_list.append(os.path.basename(self.fname))
             self.writer_stream = None
 
     def close(self):
+        """Wait for all shards to be closed, then write the dataset info."""
         logger.info(f"{self.total_count} examples have been written to {self.shard} shards")
         self.finish()
+        self._closer.shutdown(wait=True)
+        # Raise the first error closing a shard, if any
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
         self.info.write_to_json(f"{self.path}/{self.DATASET_INFO_FILENAME}", pretty_print=True)
@@ -1,72 +1,393 @@
 import io
 import logging
+import mmap
 import os.path
+import sys
 import tarfile
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
-from tarzan.features import Features
+from tarzan.features import Features, Sequence
+from tarzan.features.features import _check_keys, _leaf_encoder
+from tarzan.index import index_path, write_index
+from tarzan.utils import import_zstandard
 from tarzan.writers.base_writer import Writer
 
 logger = logging.getLogger(__name__)
 
+# Buffer size of the tar files written by `TarWriter`
+_WRITE_BUFFER_SIZE = 1 << 21
+
+# Labels of the first example indices, reused for every shard instead of formatting
+# the index of every example
+_IDX_STRS = tuple(sys.intern(str(i)) for i in range(4096))
+_NUM_IDX_STRS = len(_IDX_STRS)
+
+
+# Zeros padding member data to whole blocks, indexed by the padding length
+_PAD_VIEWS = tuple(
+    memoryview(bytes(tarfile.BLOCKSIZE))[:n] for n in range(tarfile.BLOCKSIZE)
+)
+
+
+def _header_template(type: bytes, mode: int):
+    """Header of an unnamed and empty member, as written by `TarInfo.tobuf`.
+
+    Returns the fields around the name, size and checksum fields, and the checksum
+    of these fields (with the checksum field counted as spaces, per the format).
+    """
+    tarinfo = tarfile.TarInfo()
+    tarinfo.type = type
+    tarinfo.mode = mode
+    header = tarinfo.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+    fields = (header[100:124], header[136:148], header[156:])
+    return fields, sum(map(sum, fields)) + 8 * ord(" ")
+
+
+_FILE_HEADER = _header_template(tarfile.REGTYPE, 0o644)
+_DIR_HEADER = _header_template(tarfile.DIRTYPE, 0o755)
+
+# Largest size fitting the 11 octal digits of a ustar header
+_MAX_USTAR_SIZE = 0o77777777777
+
+
+def _tar_header(tar, name: str, size: int, directory: bool = False) -> bytes:
+    """Same bytes as `TarInfo.tobuf` for the members written by `TarWriter`.
+
+    Only the name, size and checksum vary between them, so they are filled into a
+    template instead of packing every field. Members that don't fit a plain ustar
+    header (long or non-ASCII names, huge sizes) go through `TarInfo.tobuf`.
+    """
+    if directory and not name.endswith("/"):
+        name += "/"
+    # These checks are all the validation a member name gets on the common path,
+    # `TarInfo._posix_split_name` and friends only run in the fallback. They can't
+    # be settled per schema, as list indices make path lengths unbounded.
+    if (
+        tar.format == tarfile.PAX_FORMAT
+        and len(name) <= 100
+        and size <= _MAX_USTAR_SIZE
+        and name.isascii()
+    ):
+        (middle, tail, rest), checksum = _DIR_HEADER if directory else _FILE_HEADER
+        name = name.encode("ascii")
+        size_field = b"%011o\0" % size
+        checksum += sum(name) + sum(size_field)
+        return b"".join(
+            (
+                name.ljust(100, b"\0"),
+                middle,
+                size_field,
+                tail,
+                b"%06o\0 " % checksum,
+                rest,
+            )
+        )
+    tarinfo = tarfile.TarInfo(name=name)
+    tarinfo.size = size
+    if directory:
+        tarinfo.type = tarfile.DIRTYPE
+        tarinfo.mode = 0o755
+    return tarinfo.tobuf(tar.format, tar.encoding, tar.errors)
+
+
+def _add_member(tar, name: str, data=None, directory: bool = False):
+    """Lighter `tar.addfile`, writing the header and `data` straight to the file.
+
+    Unlike `tar.addfile`, `data` is not copied through a file object, and members
+    are not kept in `tar.members` which would grow with every example written.
+    """
+    # Separate writes to the buffered file are cheapest: `writelines` loops over
+    # `write` in Python, and a scatter-gather `os.writev` would bypass the buffer.
+    fileobj = tar.fileobj
+    size = len(data) if data else 0
+    buf = _tar_header(tar, name, size, directory)
+    fileobj.write(buf)
+    tar.offset += len(buf)
+    if size:
+        fileobj.write(data)
+        padding = -size % tarfile.BLOCKSIZE
+        if padding:
+            fileobj.write(_PAD_VIEWS[padding])
+        tar.offset += size + padding
+
 
 def _add_dir_to_tar(tar, name):
-    tar_info = tarfile.TarInfo(name=name)
-    tar_info.type = tarfile.DIRTYPE
-    tar_info.mode = 0o755
-    tar.addfile(tar_info)
-
-
-def _write_to_tar(tar, prefix, data):
-    size = 0
-    if isinstance(data, dict):
-        _add_dir_to_tar(tar, prefix)
-        for key, value in data.items():
-            if key.isdigit():
-                raise ValueError(
-                    "Keys cannot be integers since they are reserved for indexing."
-                )
-            size += _write_to_tar(tar, f"{prefix}/{key}", value)
-    elif isinstance(data, list):
-        _add_dir_to_tar(tar, prefix)
-        for i, value in enumerate(data):
-            size += _write_to_tar(tar, f"{prefix}/{i}", value)
-    else:
-        # Assumed to be bytes or None
-        tarinfo = tarfile.TarInfo(name=prefix)
-        if data is None:
-            size = 0
-            tar.addfile(tarinfo)
-        else:
-            size = len(data)
-            tarinfo.size = len(data)
-            tar.addfile(tarinfo, fileobj=io.BytesIO(data))
+    _add_member(tar, name, directory=True)
+
+
+def _write_file_to_tar(tar, name, data, index=None):
+    """Write `data` (bytes or None) as a file member, appending its
+    `(name, offset, size)` to `index` if given."""
+    size = 0 if data is None else len(data)
+    _add_member(tar, name, data)
+    if index is not None:
+        # The data (padded to whole blocks) was written last
+        padded_size = -(-size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        index.append((name, tar.offset - padded_size, size))
     return size
 
 
+def _check_key_names(keys) -> None:
+    for key in keys:
+        if key.isdigit():
+            raise ValueError(
+                "Keys cannot be integers since they are reserved for indexing."
+            )
+
+
+def _compile_tar_writer(
+    schema, emit_dir_entries: bool, encode: bool = True
+) -> Callable[..., int]:
+    """Specialize encoding examples of `schema` and writing them to a tar.
+
+    Like the compiled encoders of [`Features`], the schema is walked once and its
+    structure captured in nested closures `write(tar, prefix, obj, index)`, which
+    return the number of data bytes written. These encode `obj` the same way as
+    [`Features.encode_example`], but write every leaf as soon as it is encoded
+    instead of building the encoded example first. If `encode` is False, examples
+    are expected to be encoded already and leaves are written as is. Keys are
+    validated here instead of for every example. Directory members are only written
+    for dicts and lists if `emit_dir_entries` is set.
+    """
+    if isinstance(schema, dict):
+        _check_key_names(schema)
+        sub_writers = tuple(
+            (k, f"/{k}", _compile_tar_writer(v, emit_dir_entries, encode))
+            for k, v in schema.items()
+        )
+        keys = frozenset(schema)
+
+        def write_dict(tar, prefix, obj, index):
+            if obj is None:
+                return _write_file_to_tar(tar, prefix, None, index)
+            if obj.keys() != keys:
+                _check_keys(keys, obj)
+            if emit_dir_entries:
+                _add_dir_to_tar(tar, prefix)
+            size = 0
+            for key, suffix, write in sub_writers:
+                size += write(tar, prefix + suffix, obj[key], index)
+            return size
+
+        return write_dict
+
+    elif isinstance(schema, (list, tuple)) or (
+        isinstance(schema, Sequence) and not isinstance(schema.feature, dict)
+    ):
+        is_sequence = isinstance(schema, Sequence)
+        sub_writer = _compile_tar_writer(
+            schema.feature if is_sequence else schema[0], emit_dir_entries, encode
+        )
+
+        def write_list(tar, prefix, obj, index):
+            if obj is None:
+                return _write_file_to_tar(tar, prefix, None, index)
+            if is_sequence and isinstance(obj, str):
+                raise ValueError(f"Got a string but expected a list instead: '{obj}'")
+            if emit_dir_entries:
+                _add_dir_to_tar(tar, prefix)
+            size = 0
+            for i, o in enumerate(obj):
+                size += sub_writer(tar, f"{prefix}/{i}", o, index)
+            return size
+
+        return write_list
+
+    elif isinstance(schema, Sequence):
+        # Sequences of dicts are encoded (and written) as a dict of lists
+        _check_key_names(schema.feature)
+        sub_writers = tuple(
+            (k, f"/{k}", _compile_tar_writer(v, emit_dir_entries, encode))
+            for k, v in schema.feature.items()
+        )
+        keys = frozenset(schema.feature)
+
+        def write_sequence_dict(tar, prefix, obj, index):
+            if obj is None:
+                return _write_file_to_tar(tar, prefix, None, index)
+            # We allow to reverse list of dict => dict of list for compatibility with tfds
+            if isinstance(obj, (list, tuple)):
+                for o in obj:
+                    _check_keys(keys, o)
+                columns = [[o[key] for o in obj] for key, _, _ in sub_writers]
+            else:
+                _check_keys(keys, obj)
+                columns = [obj[key] for key, _, _ in sub_writers]
+            if emit_dir_entries:
+                _add_dir_to_tar(tar, prefix)
+            size = 0
+            for (_, suffix, write), column in zip(sub_writers, columns):
+                column_prefix = prefix + suffix
+                if emit_dir_entries:
+                    _add_dir_to_tar(tar, column_prefix)
+                for i, o in enumerate(column):
+                    size += write(tar, f"{column_prefix}/{i}", o, index)
+            return size
+
+        return write_sequence_dict
+
+    elif encode and hasattr(schema, "_encode_mapped"):
+        # e.g. audio files given by path are mapped and copied into the tar from there
+        encode_mapped = schema._encode_mapped
+
+        def write_mapped_leaf(tar, prefix, obj, index):
+            data = None if obj is None else encode_mapped(obj)
+            try:
+                return _write_file_to_tar(tar, prefix, data, index)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+        return write_mapped_leaf
+
+    elif encode:
+        encode_leaf = _leaf_encoder(schema)
+
+        def write_leaf(tar, prefix, obj, index):
+            data = None if obj is None else encode_leaf(obj)
+            return _write_file_to_tar(tar, prefix, data, index)
+
+        return write_leaf
+
+    else:
+        # Encoded as bytes or None
+        return _write_file_to_tar
+
+
 class TarWriter(Writer):
-    """TarWriter writes data to tar files with nested directory structure."""
+    """TarWriter writes data to tar files with nested directory structure.
+
+    Args:
+        path (`str`):
+            Destination tar file.
+        features ([`Features`]):
+            Features used to encode the examples.
+        write_index (`bool`, defaults to `False`):
+            If `True`, also write a sidecar `<path>.idx` with the name, data offset
+            and size of every file member, which lets [`TarReader`] slice members
+            out of the memory-mapped tar file instead of parsing tar headers.
+        assume_monotonic_idx (`bool`, defaults to `False`):
+            If `True`, examples must be written with the indices `"0"`, `"1"`, ...
+            in order, which is checked against a counter instead of remembering
+            every index written.
+        emit_dir_entries (`bool`, defaults to `False`):
+            If `True`, also write a directory member for every example and every
+            nested dict or list. Tar readers, including [`TarReader`], infer them
+            from the paths of the file members.
+        compression (`str`, *optional*):
+            Set to `"zstd"` to compress the tar file with zstd (which requires the
+            `zstandard` package), [`TarReader`] detects such files. Not supported
+            with `write_index`, since offsets into the compressed file can't be
+            sliced.
+    """
 
     def __init__(
         self,
         path: str,
         features: Features,
+        write_index: bool = False,
+        assume_monotonic_idx: bool = False,
+        emit_dir_entries: bool = False,
+        compression: Optional[str] = None,
     ):
-        self.tar_stream = tarfile.open(path, "w|")
+        if compression not in (None, "zstd"):
+            raise ValueError(f"Unsupported compression {compression!r}")
+        if compression is not None and write_index:
+            raise ValueError("write_index is not supported for compressed tar files")
+        zstandard = import_zstandard() if compression == "zstd" else None
+        # Compiled first, so that invalid features fail before the file is created
+        self._write_example = _compile_tar_writer(features, emit_dir_entries)
+        self._write_encoded_example = _compile_tar_writer(
+            features, emit_dir_entries, encode=False
+        )
+        self.path = path
+        # A seekable tar on a large buffer, the streaming mode "w|" would write
+        # through its own 10 KiB blocks
+        self._fileobj = open(path, "wb", buffering=_WRITE_BUFFER_SIZE)
+        if zstandard is not None:
+            # The compressed stream can't be truncated, so examples are staged
+            # uncompressed and only compressed once written successfully
+            self._compressor = zstandard.ZstdCompressor(
+                level=3, threads=-1
+            ).stream_writer(self._fileobj)
+            self._staging = io.BytesIO()
+        else:
+            self._compressor = None
+            self._staging = None
+        self.tar_stream = tarfile.open(
+            fileobj=self._fileobj if self._staging is None else self._staging,
+            mode="w",
+            copybufsize=_WRITE_BUFFER_SIZE,
+        )
         self.features = features
-        self.written_idx = set()
+        # Either the next expected index, or the set of indices written so far
+        self.next_idx = 0 if assume_monotonic_idx else None
+        self.written_idx = None if assume_monotonic_idx else set()
+        self.index = [] if write_index else None
 
     def write(self, idx: str, objects: Dict[str, Any]):
+        return self._write(self._write_example, idx, objects)
+
+    def write_encoded(self, idx: str, objects: Dict[str, Any]):
+        """Like `write`, for an example already encoded with the features, e.g. a
+        row of [`Features.encode_batch`]."""
+        return self._write(self._write_encoded_example, idx, objects)
+
+    def _write(self, write_example, idx: str, objects: Dict[str, Any]):
         if objects.keys() != self.features.keys():
             raise ValueError(
                 f"Keys {objects.keys()} do not match specified features {self.features}"
             )
-        if idx in self.written_idx:
+        if self.written_idx is None:
+            next_idx = self.next_idx
+            if idx != (
+                _IDX_STRS[next_idx] if next_idx < _NUM_IDX_STRS else str(next_idx)
+            ):
+                raise ValueError(f"Expected index {self.next_idx}, got {idx}")
+        elif idx in self.written_idx:
             raise ValueError(f"Index {idx} already written")
-        written_obj = self.features.encode_example(objects)
-        size = _write_to_tar(self.tar_stream, idx, written_obj)
-        self.written_idx.add(idx)
+        tar = self.tar_stream
+        offset = tar.offset
+        num_indexed = 0 if self.index is None else len(self.index)
+        try:
+            size = write_example(tar, idx, objects, self.index)
+        except BaseException:
+            # Members are written as they are encoded, drop those of the failed example
+            self._truncate(offset, num_indexed)
+            raise
+        if self._compressor is not None:
+            self._compress_staged()
+        if self.written_idx is None:
+            self.next_idx += 1
+        else:
+            self.written_idx.add(idx)
         return size
 
+    def _compress_staged(self):
+        with self._staging.getbuffer() as staged:
+            self._compressor.write(staged)
+        self._staging.seek(0)
+        self._staging.truncate()
+
+    def _truncate(self, offset: int, num_indexed: int):
+        """Remove the members written from `offset` on, and their index entries."""
+        if self._staging is not None:
+            # Only the current example is staged
+            self._staging.seek(0)
+            self._staging.truncate()
+        else:
+            self._fileobj.seek(offset)
+            self._fileobj.truncate()
+        self.tar_stream.offset = offset
+        if self.index is not None:
+            del self.index[num_indexed:]
+
     def close(self):
         self.tar_stream.close()
+        if self._compressor is not None:
+            # The end of the archive written by `close`
+            self._compress_staged()
+            self._compressor.close()
+        self._fileobj.close()
+        if self.index is not None:
+            write_index(index_path(self.path), self.index)
@@ -0,0 +1,109 @@
+import pickle
+
+import numpy as np
+import pytest
+from tarzan.features import Features, Json, Scalar, Sequence, Tensor, Text
+
+
+@pytest.fixture
+def features():
+    return Features({
+        'text': Text(),
+        'label': Scalar(dtype='int32'),
+        'nested': {
+            'tensor': Tensor(shape=(None, 3), dtype='float32'),
+            'tags': [Text()],
+        },
+        'posts': Sequence(feature={'title': Text(), 'meta': Json()}),
+    })
+
+
+@pytest.fixture
+def example():
+    return {
+        'text': 'hello',
+        'label': 1,
+        'nested': {
+            'tensor': np.arange(6, dtype='float32').reshape(2, 3),
+            'tags': ['a', 'b'],
+        },
+        'posts': [{'title': 'x', 'meta': {'k': 1}}, {'title': 'y', 'meta': None}],
+    }
+
+
+def test_encode_decode_example(features, example):
+    decoded = features.decode_example(features.encode_example(example))
+    assert decoded['text'] == 'hello'
+    assert decoded['label'] == 1
+    np.testing.assert_array_equal(decoded['nested']['tensor'], example['nested']['tensor'])
+    assert decoded['nested']['tags'] == ['a', 'b']
+    assert decoded['posts'] == {'title': ['x', 'y'], 'meta': [{'k': 1}, None]}
+
+
+def test_encode_decode_batch(features):
+    batch = {
+        'text': ['a', None],
+        'label': [1, 2],
+        'nested': [{'tensor': [[1, 2, 3]], 'tags': []}, {'tensor': None, 'tags': None}],
+        'posts': [[], {'title': ['t'], 'meta': [[1]]}],
+    }
+    decoded = features.decode_batch(features.encode_batch(batch))
+    assert decoded['text'] == ['a', None]
+    assert decoded['label'] == [1, 2]
+    assert decoded['nested'][1] == {'tensor': None, 'tags': None}
+    assert decoded['nested'][0]['tags'] == []
+    assert decoded['posts'] == [{'title': [], 'meta': []}, {'title': ['t'], 'meta': [[1]]}]
+
+
+def test_encode_batch_column_mismatch(features):
+    with pytest.raises(ValueError):
+        features.encode_batch({'text': ['a']})
+
+
+def test_mutation_invalidates_compiled_codecs(features, example):
+    features.encode_example(example)
+    features['extra'] = Text()
+    assert features.encode_example({**example, 'extra': 'e'})['extra'] == b'e'
+    del features['extra']
+    with pytest.raises(KeyError):
+        features.decode_example({'extra': b'e'})
+    features |= {'other': Text()}
+    assert isinstance(features, Features)
+    assert features.encode_example({**example, 'other': 'o'})['other'] == b'o'
+
+
+def test_copy(features):
+    copied = features.copy()
+    assert copied == features
+    assert copied['nested'] is not features['nested']
+    assert copied['nested']['tags'] is not features['nested']['tags']
+    assert copied['posts'].feature is not features['posts'].feature
+    assert copied['label'] is not features['label']
+
+
+def test_decode_batch_fixed_size_columns():
+    features = Features({'label': Scalar(dtype='int32'), 'point': Tensor(shape=(2,), dtype='float32')})
+    batch = features.encode_batch({'label': [1, 2, 3], 'point': [[0, 1], [2, 3], [4, 5]]})
+    decoded = features.decode_batch(batch)
+    assert [label.shape for label in decoded['label']] == [(), (), ()]
+    assert [int(label) for label in decoded['label']] == [1, 2, 3]
+    np.testing.assert_array_equal(decoded['point'][2], [4, 5])
+
+    batch['label'][1] = None
+    assert features.decode_batch(batch)['label'][1] is None
+
+
+def test_encode_stacked_column():
+    features = Features({'point': Tensor(shape=(2,), dtype='float32')})
+    points = np.arange(6, dtype='float32').reshape(3, 2)
+    encoded = features.encode_batch({'point': points})
+    assert encoded['point'] == [p.tobytes() for p in points]
+    assert pickle.loads(pickle.dumps(encoded)) == encoded
+
+
+def test_encode_stacked_column_dtype_mismatch():
+    features = Features({'label': Scalar(dtype='int32'), 'point': Tensor(shape=(2,), dtype='int32')})
+    encoded = features.encode_column(np.arange(3), 'label')
+    assert encoded == [np.int32(i).tobytes() for i in range(3)]
+    with pytest.raises(ValueError, match="Dtype int64 do not match int32"):
+        features.encode_column(np.zeros((3, 2), dtype='int64'), 'point')
@@ -10,3 +10,9 @@ def feature():
 def test_scalar(feature):
     example = {'a': 1, 'b': 2}
     assert feature.decode_example(feature.encode_example(example)) == example
+
+
+@pytest.mark.parametrize("example", [float('nan'), float('inf'), '\ud800', {'text': 'é\udc80'}, {'a': [-float('inf'), None]}, 2**70, [2**70, 1.5]])
+def test_lossless_round_trip(feature, example):
+    decoded = feature.decode_example(feature.encode_example(example))
+    assert repr(decoded) == repr(example)
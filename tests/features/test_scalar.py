@@ -1,5 +1,6 @@
+import numpy as np
 import pytest
-from tarzan.features import Scalar
+from tarzan.features import Features, Scalar
 
 
 @pytest.fixture
@@ -10,3 +11,19 @@ def feature():
 def test_scalar(feature):
     example = 1
     assert feature.decode_example(feature.encode_example(example)) == example
+
+
+def test_cached_encoding():
+    features = Features({'label': Scalar(dtype='float32')})
+    for value in [1, 1, np.float32(1.5), np.array(2.5, dtype='float32'), True]:
+        encoded = features.encode_example({'label': value})['label']
+        assert encoded == np.asarray(value, dtype='float32').tobytes()
+    with pytest.raises(ValueError):
+        features.encode_example({'label': 'a'})
+
+
+def test_signed_zero():
+    features = Features({'label': Scalar(dtype='float32')})
+    for value in [0.0, -0.0, np.float32(0.0), np.float32(-0.0)]:
+        encoded = features.encode_example({'label': value})['label']
+        assert encoded == np.float32(value).tobytes()
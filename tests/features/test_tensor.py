@@ -1,6 +1,11 @@
+import io
+import pickle
+import tarfile
+
 import numpy as np
 import pytest
 from tarzan.features import Tensor
+from tarzan.utils import StreamWrapper
 
 
 @pytest.fixture
@@ -11,3 +16,62 @@ def feature():
 def test_tensor(feature):
     example = np.random.rand(3, 4).astype('float32')
     np.testing.assert_allclose(feature.decode_example(feature.encode_example(example)), example)
+
+
+def test_tensor_from_stream(feature, tmpdir):
+    example = np.random.rand(3, 4).astype('float32')
+    path = str(tmpdir / 'tensor.tar')
+    with tarfile.open(path, 'w') as tar:
+        for name, data in [('tensor', feature.encode_example(example)), ('empty', b'')]:
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tar.addfile(tarinfo, io.BytesIO(data))
+
+    with tarfile.open(path) as tar:
+        decoded = feature.decode_example(StreamWrapper(tar.extractfile('tensor')))
+        np.testing.assert_array_equal(decoded, example)
+        assert feature.decode_example(StreamWrapper(tar.extractfile('empty'))) is None
+        with pytest.raises(ValueError):
+            Tensor(shape=(2,), dtype='float32').decode_example(StreamWrapper(tar.extractfile('tensor')))
+
+
+def test_shape_mismatch(feature):
+    with pytest.raises(ValueError, match='must have the same rank'):
+        feature.encode_example(np.zeros((3, 4, 1), dtype='float32'))
+    with pytest.raises(ValueError, match='are incompatible'):
+        feature.encode_example(np.zeros((3, 5), dtype='float32'))
+    assert Tensor(shape=(None, 4), dtype='int8').encode_example(np.zeros((2, 4), dtype='int8')) == bytes(8)
+
+
+def test_tensor_batch(feature):
+    batch = np.random.rand(5, 3, 4).astype('float32')
+    encoded = feature.encode_batch(batch)
+    assert len(encoded) == 5
+    assert bytes(encoded[2]) == feature.encode_example(batch[2])
+    decoded = feature.decode_batch(b''.join(encoded), 5)
+    np.testing.assert_array_equal(decoded, batch)
+    with pytest.raises(ValueError):
+        feature.encode_batch(batch[:, :2])
+    empty = Tensor(shape=(0,), dtype='bool').encode_batch(np.zeros((3, 0), dtype='bool'))
+    assert [bytes(value) for value in empty] == [b''] * 3
+
+
+def test_tensor_pickle(feature):
+    example = np.random.rand(3, 4).astype('float32')
+    restored = pickle.loads(pickle.dumps(feature))
+    assert restored == feature
+    np.testing.assert_array_equal(restored.decode_example(example.tobytes()), example)
+
+
+@pytest.mark.parametrize('shape', [(3, 4), (None, 4)])
+def test_tensor_zero_copy(shape):
+    example = np.random.rand(3, 4).astype('float32')
+    encoded = Tensor(shape=shape, dtype='float32').encode_example(example)
+    decoded = Tensor(shape=shape, dtype='float32').decode_example(encoded)
+    assert not decoded.flags.writeable
+    assert np.shares_memory(decoded, np.frombuffer(encoded, dtype='uint8'))
+
+    buffer = bytearray(encoded)
+    decoded = Tensor(shape=shape, dtype='float32').decode_example(memoryview(buffer))
+    buffer[:4] = np.float32(42).tobytes()
+    assert decoded[0, 0] == 42
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from tarzan.features import Features, Json, Scalar, Sequence, Tensor, Text
+from tarzan.readers import TarReader
+from tarzan.writers import TarWriter
+
+
+@pytest.fixture
+def features():
+    return Features({
+        "text": Text(),
+        "meta": Json(),
+        "label": Scalar(dtype="int32"),
+        "nested": {"tensor": Tensor(shape=(2,), dtype="float32"), "tags": [Text()]},
+        "posts": Sequence(feature={"title": Text()}),
+    })
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_tar_reader(features, tmpdir, use_index):
+    examples = [
+        {
+            "text": f"hello_{i}" if i else None,
+            "meta": {"id": i},
+            "label": i,
+            "nested": {"tensor": np.full(2, i, dtype="float32"), "tags": ["a"] * (i + 1)},
+            "posts": [{"title": f"t{j}"} for j in range(i + 1)],
+        }
+        for i in range(3)
+    ]
+    with TarWriter(f"{tmpdir}/fake.tar", features, write_index=use_index) as writer:
+        for i, example in enumerate(examples):
+            writer.write(str(i), example)
+
+    read = list(TarReader([f"{tmpdir}/fake.tar"], features, use_index=use_index))
+    assert [index for _, index, _ in read] == ["0", "1", "2"]
+    for i, (_, _, example) in enumerate(read):
+        assert example["text"] == (f"hello_{i}" if i else None)
+        assert example["meta"] == {"id": i}
+        assert example["label"] == i
+        np.testing.assert_array_equal(example["nested"]["tensor"], [i, i])
+        assert example["posts"] == {"title": [f"t{j}" for j in range(i + 1)]}
+
+
+@pytest.mark.parametrize("emit_dir_entries", [False, True])
+def test_single_feature(tmpdir, emit_dir_entries):
+    features = Features({"text": Text()})
+    with TarWriter(f"{tmpdir}/fake.tar", features, emit_dir_entries=emit_dir_entries) as writer:
+        writer.write("0", {"text": "hello"})
+
+    read = list(TarReader([f"{tmpdir}/fake.tar"], features))
+    assert [example for _, _, example in read] == [{"text": "hello"}]
+
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_failed_write_is_rolled_back(features, tmpdir, use_index):
+    example = {
+        "text": "hello",
+        "meta": None,
+        "label": 1,
+        "nested": {"tensor": np.zeros(2, dtype="float32"), "tags": ["a"]},
+        "posts": {"title": ["t"]},
+    }
+    with TarWriter(f"{tmpdir}/fake.tar", features, write_index=use_index) as writer:
+        writer.write("0", example)
+        with pytest.raises(ValueError):
+            writer.write("1", {**example, "nested": {"tensor": np.zeros(3, dtype="float32"), "tags": []}})
+        writer.write("2", example)
+
+    read = list(TarReader([f"{tmpdir}/fake.tar"], features, use_index=use_index))
+    assert [index for _, index, _ in read] == ["0", "2"]
+    assert read[1][2]["posts"] == {"title": ["t"]}
+
+
+def test_zstd(features, tmpdir):
+    pytest.importorskip("zstandard")
+    example = {
+        "text": None,
+        "meta": {"id": 0},
+        "label": 1,
+        "nested": {"tensor": np.zeros(2, dtype="float32"), "tags": ["a"]},
+        "posts": {"title": ["t"]},
+    }
+    with TarWriter(f"{tmpdir}/fake.tar.zst", features, compression="zstd") as writer:
+        writer.write("0", example)
+        with pytest.raises(ValueError):
+            writer.write("1", {**example, "nested": {"tensor": np.zeros(3, dtype="float32"), "tags": []}})
+        writer.write("2", example)
+
+    read = list(TarReader([f"{tmpdir}/fake.tar.zst"], features))
+    assert [index for _, index, _ in read] == ["0", "2"]
+    assert read[1][2]["text"] is None
+    assert read[1][2]["posts"] == {"title": ["t"]}
@@ -18,3 +18,35 @@ def test_save_to_json(info, tmpdir):
     assert (tmpdir / "dataset_info.json").exists()
 
     assert DatasetInfo.from_json(tmpdir / "dataset_info.json") == info
+
+
+def test_file_list_round_trip(info, tmpdir):
+    info.file_list = [f"shard-{i:06d}.tar" for i in range(3)]
+    info.write_to_json(tmpdir / "dataset_info.json")
+    with open(tmpdir / "dataset_info.json", "rb") as f:
+        assert b'"file_list":["shard-000000.tar",' in f.read()
+    assert DatasetInfo.from_json(tmpdir / "dataset_info.json") == info
+
+    # Only whole directories are packed
+    info.write_to_json(tmpdir / "dataset_info.json", pack_file_list=True)
+    with open(tmpdir / "dataset_info.json", "rb") as f:
+        assert b'"file_list":["shard-000000.tar",' in f.read()
+    info.file_list = [f"data/train/shard-{i:06d}.tar" for i in range(3)]
+    info.write_to_json(tmpdir / "dataset_info.json", pack_file_list=True)
+    with open(tmpdir / "dataset_info.json", "rb") as f:
+        assert b'"file_list":{"prefix":"data/train/","names":["shard-000000.tar",' in f.read()
+    assert DatasetInfo.from_json(tmpdir / "dataset_info.json") == info
+    assert DatasetInfo(file_list=["shard-000000.tar"]).file_list == ["shard-000000.tar"]
+
+
+def test_copy(info):
+    info.file_list = ["a.tar", "b.tar"]
+    copied = info.copy()
+    assert copied == info
+    assert copied.file_list is not info.file_list
+    assert copied.metadata is not info.metadata
+
+    other = DatasetInfo(file_list=["c.tar"], metadata={"other": 1})
+    info.update(other)
+    assert info.file_list == ["c.tar"] and info.file_list is not other.file_list
+    assert info.metadata == {"key": "value", "other": 1}
@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+from tarzan.features import Features, Tensor, Text
+from tarzan.info import DatasetInfo
+from tarzan.readers import TarReader
+from tarzan.writers import ParallelShardWriter, ShardWriter
+
+
+@pytest.fixture
+def info():
+    return DatasetInfo(description="A test dataset", features=Features({"text": Text()}))
+
+
+def test_write_many(info, tmpdir):
+    with ShardWriter(str(tmpdir), info, max_count=2) as writer:
+        writer.write({"text": "hello_0"})
+        writer.write_many({"text": f"hello_{i}"} for i in range(1, 5))
+
+    assert info.file_list == ["00000.tar", "00001.tar", "00002.tar"]
+    assert os.path.exists(tmpdir / ShardWriter.DATASET_INFO_FILENAME)
+    reader = TarReader.from_dataset_info(str(tmpdir / ShardWriter.DATASET_INFO_FILENAME))
+    assert [(index, example["text"]) for _, index, example in reader] == [
+        ("0", "hello_0"), ("1", "hello_1"), ("0", "hello_2"), ("1", "hello_3"), ("0", "hello_4")
+    ]
+
+
+def test_write_batch(tmpdir):
+    info = DatasetInfo(features=Features({"text": Text(), "point": Tensor(shape=(2,), dtype="float32")}))
+    points = np.arange(10, dtype="float32").reshape(5, 2)
+    with ShardWriter(str(tmpdir), info, max_count=2) as writer:
+        writer.write_batch({"text": [f"hello_{i}" for i in range(5)], "point": points})
+        with pytest.raises(ValueError):
+            writer.write_batch({"text": ["a"], "point": points})
+
+    reader = TarReader.from_dataset_info(str(tmpdir / ShardWriter.DATASET_INFO_FILENAME))
+    examples = [example for _, _, example in reader]
+    assert [example["text"] for example in examples] == [f"hello_{i}" for i in range(5)]
+    np.testing.assert_array_equal([example["point"] for example in examples], points)
+
+
+def test_parallel_shard_writer(info, tmpdir):
+    with ParallelShardWriter(str(tmpdir), info, max_count=2, num_workers=2) as writer:
+        for i in range(5):
+            writer.write({"text": f"hello_{i}"})
+
+    assert info.file_list == ["00000.tar", "00001.tar", "00002.tar"]
+    reader = TarReader.from_dataset_info(str(tmpdir / ShardWriter.DATASET_INFO_FILENAME))
+    assert [example["text"] for _, _, example in reader] == [f"hello_{i}" for i in range(5)]
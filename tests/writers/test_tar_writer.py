@@ -1,9 +1,10 @@
 import pytest
 import tarfile
 
-from tarzan.features import Features, Text
+from tarzan.features import Audio, Features, Text
 from tarzan.info import DatasetInfo
 from tarzan.writers import TarWriter
+from tarzan.writers.tar_writer import _tar_header
 
 
 @pytest.fixture
@@ -24,7 +25,63 @@ def test_chunk_writer(info, tmpdir):
 
     with tarfile.open(f"{tmpdir}/fake.tar", "r") as tar:
         print(tar.getnames())
-        assert sorted(tar.getnames()) == ['0', '0/text', '1', '1/text', '2', '2/text']
+        assert sorted(tar.getnames()) == ['0/text', '1/text', '2/text']
         for i in range(3):
             content = tar.extractfile(f"{i}/text").read()
             assert info.features.decode_column([content], 'text')[0] == f"hello_{i}"
+
+
+def test_integer_keys(tmpdir):
+    with pytest.raises(ValueError, match="Keys cannot be integers"):
+        TarWriter(f"{tmpdir}/fake.tar", Features({"nested": {"0": Text()}}))
+
+
+def test_monotonic_idx(info, tmpdir):
+    with TarWriter(f"{tmpdir}/fake.tar", info.features, assume_monotonic_idx=True) as writer:
+        writer.write("0", {"text": "a"})
+        with pytest.raises(ValueError, match="Expected index 1"):
+            writer.write("0", {"text": "b"})
+        writer.write("1", {"text": "b"})
+
+
+def test_dir_entries(info, tmpdir):
+    with TarWriter(f"{tmpdir}/fake.tar", info.features, emit_dir_entries=True) as writer:
+        writer.write("0", {"text": "hello"})
+
+    with tarfile.open(f"{tmpdir}/fake.tar", "r") as tar:
+        assert tar.getnames() == ['0', '0/text']
+        assert tar.getmember('0').isdir()
+
+
+@pytest.mark.parametrize("name", ["0/text", "1/" + "x" * 98, "2/" + "x" * 99, "3/téxt"])
+@pytest.mark.parametrize("size", [0, 5, 0o77777777777, 0o77777777777 + 1])
+@pytest.mark.parametrize("directory", [False, True])
+def test_tar_header(tmpdir, name, size, directory):
+    with tarfile.open(f"{tmpdir}/fake.tar", "w") as tar:
+        tarinfo = tarfile.TarInfo(name=name)
+        tarinfo.size = size
+        if directory:
+            tarinfo.type = tarfile.DIRTYPE
+            tarinfo.mode = 0o755
+        expected = tarinfo.tobuf(tar.format, tar.encoding, tar.errors)
+        assert _tar_header(tar, name, size, directory) == expected
+
+
+def test_compression_options(info, tmpdir):
+    with pytest.raises(ValueError, match="Unsupported compression"):
+        TarWriter(f"{tmpdir}/fake.tar", info.features, compression="gzip")
+    with pytest.raises(ValueError, match="write_index is not supported"):
+        TarWriter(f"{tmpdir}/fake.tar", info.features, write_index=True, compression="zstd")
+
+
+def test_audio_path(tmpdir):
+    features = Features({"audio": Audio()})
+    for i, data in enumerate([b"RIFF audio", b""]):
+        (tmpdir / f"{i}.wav").write_binary(data)
+    with TarWriter(f"{tmpdir}/fake.tar", features) as writer:
+        for i in range(2):
+            writer.write(str(i), {"audio": str(tmpdir / f"{i}.wav")})
+
+    with tarfile.open(f"{tmpdir}/fake.tar", "r") as tar:
+        assert tar.extractfile("0/audio").read() == b"RIFF audio"
+        assert tar.extractfile("1/audio").read() == b""